@@ -0,0 +1,332 @@
+"""Асинхронная версия бота (AsyncTeleBot + общая aiohttp-сессия).
+
+Запросы курсов и погоды выполняются корутинами, поэтому тысячи
+одновременных запросов перекрываются в одном процессе.
+Запуск: python async_bot.py
+"""
+import asyncio
+import logging
+import random
+import time
+from config import Config
+from database import open_database
+from utils.helpers import (
+    build_tasks_page,
+    create_main_keyboard,
+    decode_task_cursor,
+    geo_cache,
+    rate_prefetcher,
+)
+from utils.async_helpers import close_session, get_exchange_rate, get_weather
+from utils.metrics import instrument_handler, start_metrics_server
+from utils.ratelimit import ANY_COMMAND, RateLimiter, limit_group, parse_limits
+from utils.reminders import ReminderScheduler, split_due
+from utils.router import ANY, REST, WORDS, ArgumentError, CommandRouter, upper
+from utils.messages import (
+    CONVERTER_HINT_TEXT,
+    CURRENCY_AMOUNT_INVALID_TEXT,
+    CURRENCY_FAILED_TEXT,
+    CURRENCY_USAGE_TEXT,
+    HELP_TEXT,
+    RANDOM_NUMBER_INVALID_TEXT,
+    RANDOM_OPTIONS_TEXT,
+    TASKS_EMPTY_TEXT,
+    TODO_ADD_USAGE_TEXT,
+    TODO_DELETE_USAGE_TEXT,
+    WEATHER_FAILED_TEXT,
+    WEATHER_HINT_TEXT,
+    WEATHER_USAGE_TEXT,
+    WELCOME_TEXT,
+    format_currency_result,
+    format_weather,
+    random_number_usage,
+    rate_limited_text,
+    reminder_text,
+    task_added_text,
+)
+
+# Создаются в create_async_bot(): модуль импортируется без токена, сети и БД
+bot = None
+db = None
+# Планировщик напоминаний запускается в main(), когда есть цикл событий
+reminders = None
+
+router = CommandRouter()
+limiter = RateLimiter(parse_limits(Config.RATE_LIMITS)) if Config.RATE_LIMIT else None
+
+def create_async_bot(token=None, api_url=None, database=None):
+    """Собрать асинхронного бота: AsyncTeleBot, база данных и обработчики.
+
+    Аналог bot.create_bot: token, api_url и database подставляются,
+    например, для тестов. telebot импортируется здесь, а схема БД
+    проверяется при первом запросе к ней.
+    """
+    global bot, db
+    from telebot import asyncio_helper # type: ignore
+    from telebot.async_telebot import AsyncTeleBot # type: ignore
+    api_url = api_url or Config.TELEGRAM_API_URL
+    if api_url:
+        asyncio_helper.API_URL = api_url.rstrip('/') + '/bot{0}/{1}'
+    bot = AsyncTeleBot(token or Config.BOT_TOKEN)
+    db = database or open_database(
+        Config.DATABASE_URL,
+        pool_size=Config.DB_POOL_SIZE,
+        lazy=True,
+        write_behind=Config.DB_WRITE_BEHIND,
+        flush_interval=Config.DB_FLUSH_INTERVAL,
+        flush_batch=Config.DB_FLUSH_BATCH,
+        task_cache=Config.TASK_CACHE,
+        task_cache_users=Config.TASK_CACHE_USERS,
+        task_cache_bytes=Config.TASK_CACHE_BYTES,
+    )
+    geo_cache.store = db
+    bot.register_message_handler(handle_message, content_types=['text'])
+    bot.register_callback_query_handler(handle_tasks_page, func=is_tasks_page)
+    return bot
+
+async def rate_limited(message, group=ANY_COMMAND):
+    """Проверка лимита пользователя; True - сообщение отбрасывается"""
+    user_id = message.from_user.id if message.from_user else message.chat.id
+    retry_after = limiter.check(user_id, group)
+    if not retry_after:
+        return False
+    if limiter.first_rejection(user_id, retry_after):
+        await bot.send_message(message.chat.id, rate_limited_text(retry_after))
+    return True
+
+async def handle_message(message):
+    """Единая точка входа текстовых сообщений: лимиты, затем разбор по таблице команд"""
+    if limiter is not None and await rate_limited(message):
+        return
+    try:
+        handler, args = router.resolve(message.text)
+    except ArgumentError as e:
+        await bot.send_message(message.chat.id, e.text, parse_mode='Markdown')
+        return
+    group = getattr(handler, 'rate_limit_group', None)
+    if group is not None and limiter is not None and await rate_limited(message, group):
+        return
+    await handler(message, *args)
+
+@router.command('start')
+@instrument_handler
+async def send_welcome(message):
+    await bot.send_message(
+        message.chat.id,
+        WELCOME_TEXT,
+        reply_markup=create_main_keyboard(),
+        parse_mode='Markdown'
+    )
+
+@router.command('help')
+@instrument_handler
+async def send_help(message):
+    await bot.send_message(message.chat.id, HELP_TEXT, parse_mode='Markdown')
+
+@router.command('todo')
+@router.command('todo', 'list')
+@router.button('Мои задачи')
+@instrument_handler
+async def handle_todo_list(message):
+    await show_tasks(message.chat.id)
+
+@router.command('todo', 'add', params=(REST,), usage=TODO_ADD_USAGE_TEXT)
+@limit_group('todo')
+@instrument_handler
+async def handle_todo_add(message, task_text):
+    chat_id = message.chat.id
+    try:
+        task_text, due_at = split_due(task_text, time.time(), Config.UTC_OFFSET)
+        task_id = await asyncio.to_thread(db.add_task, chat_id, task_text, due_at)
+        if due_at is not None and reminders is not None:
+            reminders.schedule(task_id, chat_id, due_at)
+        await bot.send_message(
+            chat_id, task_added_text(task_text, due_at, Config.UTC_OFFSET), parse_mode='Markdown'
+        )
+    except Exception as e:
+        logging.error(f"Todo error: {e}")
+        await bot.send_message(chat_id, "❌ Произошла ошибка при обработке запроса")
+
+@router.command(
+    'todo', 'delete', params=(int,), usage=TODO_DELETE_USAGE_TEXT, invalid="❌ Неверный номер задачи"
+)
+@limit_group('todo')
+@instrument_handler
+async def handle_todo_delete(message, task_id):
+    chat_id = message.chat.id
+    try:
+        if await asyncio.to_thread(db.delete_task, chat_id, task_id):
+            await bot.send_message(chat_id, "✅ Задача удалена")
+        else:
+            await bot.send_message(chat_id, "❌ Задача не найдена")
+    except Exception as e:
+        logging.error(f"Todo error: {e}")
+        await bot.send_message(chat_id, "❌ Произошла ошибка при обработке запроса")
+
+@router.command('todo', ANY)
+@instrument_handler
+async def handle_todo_unknown(message, *args):
+    await bot.send_message(message.chat.id, "❌ Неизвестная команда. Используйте: add, list или delete")
+
+@router.command(
+    'currency', params=(float, upper, upper), usage=CURRENCY_USAGE_TEXT, invalid=CURRENCY_AMOUNT_INVALID_TEXT
+)
+@limit_group('currency')
+@instrument_handler
+async def handle_currency(message, amount, from_currency, to_currency):
+    chat_id = message.chat.id
+    try:
+        converted_amount, rate = await get_exchange_rate(from_currency, to_currency, amount)
+        if converted_amount is not None and rate is not None:
+            result_text = format_currency_result(amount, from_currency, to_currency, converted_amount, rate)
+        else:
+            result_text = CURRENCY_FAILED_TEXT
+        await bot.send_message(chat_id, result_text, parse_mode='Markdown')
+
+    except Exception as e:
+        logging.error(f"Currency error: {e}")
+        await bot.send_message(chat_id, f'❌ Произошла ошибка при конвертации: {str(e)}')
+
+@router.command('weather', params=(REST,), usage=WEATHER_USAGE_TEXT)
+@limit_group('weather')
+@instrument_handler
+async def handle_weather(message, city):
+    chat_id = message.chat.id
+    try:
+        weather_data = await get_weather(city)
+        if weather_data == "city_not_found":
+            await bot.send_message(chat_id, f"❌ Город '{city}' не найден")
+            return
+        weather_text = format_weather(weather_data) if weather_data else WEATHER_FAILED_TEXT
+        await bot.send_message(chat_id, weather_text, parse_mode='Markdown')
+
+    except Exception as e:
+        logging.error(f'Weather error: {e}')
+        await bot.send_message(chat_id, '❌ Произошла ошибка при получении погоды')
+
+@router.command(
+    'random', 'number', params=(int, int), usage=random_number_usage, invalid=RANDOM_NUMBER_INVALID_TEXT
+)
+@instrument_handler
+async def handle_random_number(message, min_val, max_val):
+    chat_id = message.chat.id
+    if min_val >= max_val:
+        await bot.send_message(chat_id, "❌ Первое число должно быть меньше второго")
+    else:
+        result = random.randint(min_val, max_val)
+        await bot.send_message(chat_id, f"🎲 Случайное число: *{result}*", parse_mode='Markdown')
+
+@router.command('random', 'choice', params=(WORDS,))
+@instrument_handler
+async def handle_random_choice(message, choices):
+    chat_id = message.chat.id
+    if not choices:
+        await bot.send_message(chat_id, "❌ Укажите варианты: `/random choice пицца суши`", parse_mode='Markdown')
+    elif len(choices) < 2:
+        await bot.send_message(chat_id, "❌ Укажите хотя бы 2 варианта для выбора")
+    else:
+        result = random.choice(choices)
+        await bot.send_message(chat_id, f"🎯 Я выбираю: *{result}*", parse_mode='Markdown')
+
+@router.command('random')
+@router.command('random', ANY)
+@router.button('Случайность')
+@instrument_handler
+async def show_random_options(message, *args):
+    await bot.send_message(message.chat.id, RANDOM_OPTIONS_TEXT, parse_mode='Markdown')
+
+@router.button('Конвертер')
+@instrument_handler
+async def handle_converter_button(message):
+    await bot.send_message(message.chat.id, CONVERTER_HINT_TEXT, parse_mode='Markdown')
+
+@router.button('Погода')
+@instrument_handler
+async def handle_weather_button(message):
+    await bot.send_message(message.chat.id, WEATHER_HINT_TEXT, parse_mode='Markdown')
+
+@router.fallback
+@instrument_handler
+async def handle_unknown(message):
+    await bot.send_message(message.chat.id, "Не понимаю команду. Используйте кнопки меню или /help")
+
+async def show_tasks(chat_id):
+    """Показать задачи пользователю"""
+    try:
+        tasks_text, keyboard = await asyncio.to_thread(build_tasks_page, db, chat_id)
+        if tasks_text is None:
+            await bot.send_message(chat_id, TASKS_EMPTY_TEXT, parse_mode='Markdown')
+            return
+        await bot.send_message(chat_id, tasks_text, reply_markup=keyboard, parse_mode='Markdown')
+    except Exception as e:
+        logging.error(f"Show tasks error: {e}")
+        await bot.send_message(chat_id, "❌ Ошибка при загрузке задач")
+
+def is_tasks_page(call):
+    return bool(call.data) and call.data.startswith('tasks:')
+
+@instrument_handler
+async def handle_tasks_page(call):
+    """Листание списка задач кнопками"""
+    try:
+        _, direction, value = call.data.split(':', 2)
+        chat_id = call.message.chat.id
+        tasks_text, keyboard = await asyncio.to_thread(
+            build_tasks_page, db, chat_id, decode_task_cursor(value), direction == 'prev'
+        )
+        if tasks_text is None:
+            await bot.answer_callback_query(call.id, "Задач больше нет")
+            return
+        await bot.edit_message_text(
+            tasks_text,
+            chat_id,
+            call.message.message_id,
+            reply_markup=keyboard,
+            parse_mode='Markdown'
+        )
+        await bot.answer_callback_query(call.id)
+    except Exception as e:
+        logging.error(f"Tasks page error: {e}")
+        await bot.answer_callback_query(call.id, "❌ Ошибка при загрузке задач")
+
+def start_reminders(loop):
+    """Планировщик в своем потоке; отправка - корутинами в цикле событий loop"""
+    global reminders
+
+    def deliver(tasks):
+        for task in tasks:
+            asyncio.run_coroutine_threadsafe(
+                bot.send_message(task['user_id'], reminder_text(task), parse_mode='Markdown'), loop
+            )
+
+    reminders = ReminderScheduler(
+        db, deliver, tick=Config.REMINDER_TICK, horizon=Config.REMINDER_HORIZON
+    ).start()
+
+def configure_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+async def main():
+    logging.info("Асинхронный бот запущен")
+    if Config.REMINDERS:
+        start_reminders(asyncio.get_running_loop())
+    if Config.METRICS_PORT:
+        start_metrics_server(Config.METRICS_HOST, Config.METRICS_PORT)
+    if Config.RATE_PREFETCH:
+        # обновление идет в своем потоке синхронным клиентом и не занимает цикл событий
+        rate_prefetcher.start()
+    try:
+        await bot.infinity_polling()
+    finally:
+        await close_session()
+
+if __name__ == '__main__':
+    configure_logging()
+    if not Config.BOT_TOKEN:
+        print("❌ ОШИБКА: BOT_TOKEN не найден!")
+        exit(1)
+    create_async_bot()
+    asyncio.run(main())
@@ -0,0 +1,48 @@
+"""Бенчмарк Database: соединение на каждый вызов против постоянных соединений.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_database
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+OPS_PER_WORKER = 200
+WORKERS = (1, 8, 32)
+
+
+def run_worker(db, user_id):
+    ids = [db.add_task(user_id, f'задача {i}') for i in range(OPS_PER_WORKER)]
+    for _ in range(OPS_PER_WORKER):
+        db.get_user_tasks(user_id)
+    for task_id in ids:
+        db.delete_task(user_id, task_id)
+
+
+def bench(persistent, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), persistent=persistent)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda uid: run_worker(db, uid), range(workers)))
+        elapsed = time.perf_counter() - start
+        db.close()
+    return workers * OPS_PER_WORKER * 3 / elapsed
+
+
+def main():
+    print(f"{'workers':>8} {'per-call ops/s':>16} {'persistent ops/s':>18} {'x':>6}")
+    for workers in WORKERS:
+        before = bench(False, workers)
+        after = bench(True, workers)
+        print(f'{workers:>8} {before:>16.0f} {after:>18.0f} {after / before:>6.1f}')
+
+
+if __name__ == '__main__':
+    main()
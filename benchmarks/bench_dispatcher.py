@@ -0,0 +1,87 @@
+"""Нагрузочный тест ChatDispatcher на поддельном потоке апдейтов Telegram.
+
+FakeTelegramAPI выдает пачки апдейтов как getUpdates, обработчики
+имитируют блокирующие вызовы (/weather и /currency ходят "в сеть").
+Проверяется рост пропускной способности с числом воркеров и то,
+что апдейты каждого чата обрабатываются по порядку.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_dispatcher
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dispatcher import ChatDispatcher, update_chat_id  # noqa: E402
+
+CHATS = 200
+UPDATES = 2000
+BATCH = 100
+HANDLER_DELAY = {'/weather': 0.02, '/currency': 0.01, '/todo': 0.001, '/random': 0.0}
+
+
+class FakeTelegramAPI:
+    """Источник апдейтов в формате getUpdates"""
+
+    def __init__(self, total, chats):
+        rng = random.Random(42)
+        self.updates = [
+            SimpleNamespace(
+                update_id=i,
+                message=SimpleNamespace(
+                    chat=SimpleNamespace(id=rng.randrange(chats)),
+                    text=rng.choice(list(HANDLER_DELAY)),
+                ),
+            )
+            for i in range(total)
+        ]
+        self.offset = 0
+
+    def get_updates(self, limit):
+        batch = self.updates[self.offset:self.offset + limit]
+        self.offset += len(batch)
+        return batch
+
+
+def run(workers):
+    api = FakeTelegramAPI(UPDATES, CHATS)
+    seen = defaultdict(list)
+
+    def handle(update):
+        time.sleep(HANDLER_DELAY[update.message.text])
+        seen[update.message.chat.id].append(update.update_id)
+
+    dispatcher = ChatDispatcher(workers=workers).start()
+    start = time.perf_counter()
+    while True:
+        batch = api.get_updates(BATCH)
+        if not batch:
+            break
+        for update in batch:
+            dispatcher.submit(update_chat_id(update), handle, update)
+    dispatcher.join()
+    elapsed = time.perf_counter() - start
+    stats = dispatcher.stats()
+    dispatcher.stop()
+
+    ordered = all(ids == sorted(ids) for ids in seen.values())
+    return UPDATES / elapsed, stats, ordered
+
+
+def main():
+    print(f"{'workers':>8} {'updates/s':>10} {'avg ms':>8} {'max ms':>8} {'ordered':>8}")
+    for workers in (1, 2, 4, 8, 16, 32):
+        throughput, stats, ordered = run(workers)
+        print(
+            f"{workers:>8} {throughput:>10.0f} {stats['latency_avg'] * 1000:>8.1f} "
+            f"{stats['latency_max'] * 1000:>8.1f} {str(ordered):>8}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Сравнение синхронного (requests.Session) и асинхронного (aiohttp) путей
+запроса курсов на локальном мок-сервере.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_http [запросов] [параллельность]
+"""
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import async_helpers, helpers  # noqa: E402
+
+UPSTREAM_DELAY = 0.02
+RATES = {'rates': {'USD': 1.0, 'EUR': 0.92, 'RUB': 92.5}}
+
+
+class MockRatesHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        time.sleep(UPSTREAM_DELAY)
+        body = json.dumps(RATES).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockRatesHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def report(name, latencies, elapsed):
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f'{name:>6} {len(latencies) / elapsed:>10.0f} req/s  '
+        f'p50 {statistics.median(latencies) * 1000:>7.1f} ms  p99 {p99 * 1000:>7.1f} ms'
+    )
+
+
+def timed_sync():
+    start = time.perf_counter()
+    helpers.get_exchange_rate('USD', 'EUR', 100)
+    return time.perf_counter() - start
+
+
+async def timed_async(semaphore):
+    async with semaphore:
+        start = time.perf_counter()
+        await async_helpers.get_exchange_rate('USD', 'EUR', 100)
+        return time.perf_counter() - start
+
+
+async def run_async(total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed_async(semaphore) for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    await async_helpers.close_session()
+    return list(latencies), elapsed
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    server = start_mock_server()
+    url = f'http://127.0.0.1:{server.server_port}/latest/{{base}}'
+    helpers.EXCHANGE_RATE_APIS = [{
+        'name': 'Mock',
+        'url': url,
+        'parse_func': lambda data, to_curr: data.get('rates', {}).get(to_curr),
+    }]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(lambda _: timed_sync(), range(total)))
+    report('sync', latencies, time.perf_counter() - start)
+
+    latencies, elapsed = asyncio.run(run_async(total, concurrency))
+    report('async', latencies, elapsed)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Нагрузочный тест бота целиком против локальных подставных серверов.
+
+Поднимает в отдельных процессах имитацию Bot API и мок внешних API
+(benchmarks.fake_servers), собирает бота через bot.create_bot() с
+временной базой и запускает long polling. Генератор воспроизводит смесь
+команд от множества синтетических чатов с заданной скоростью; отчет -
+пропускная способность, задержка от апдейта до ответа (p50/p95/p99),
+CPU и пиковая память процесса бота. Лишние ответы (повторная обработка
+апдейта) или апдейты без ответа - код выхода 1.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_load [апдейтов/с] [секунд] [чатов] [задержка_курсов] [задержка_погоды]
+"""
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# validate_token в pyTelegramBotAPI требует вид <id>:<секрет>
+TOKEN = '123456:load-test'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(*args):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.fake_servers', args[0], str(port), *map(str, args[1:])],
+        cwd=ROOT,
+    )
+    deadline = time.monotonic() + 10
+    while True:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f'http://127.0.0.1:{port}'
+        except OSError:
+            if time.monotonic() > deadline:
+                process.kill()
+                raise
+            time.sleep(0.05)
+
+
+def control(api_url, action, **params):
+    query = '&'.join(f'{key}={value}' for key, value in params.items())
+    with urllib.request.urlopen(f'{api_url}/control/{action}?{query}') as response:
+        return json.loads(response.read())
+
+
+def main():
+    rate = float(sys.argv[1]) if len(sys.argv) > 1 else 200
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 15
+    chats = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    rates_latency = float(sys.argv[4]) if len(sys.argv) > 4 else 0.05
+    weather_latency = float(sys.argv[5]) if len(sys.argv) > 5 else 0.1
+
+    api_process, api_url = start_server('bot-api')
+    upstream_process, upstream_url = start_server('upstream', rates_latency, weather_latency)
+    # Config читает окружение при импорте: лимиты Telegram не должны ограничивать замер
+    os.environ.update({
+        'BOT_TOKEN': TOKEN,
+        'TELEGRAM_API_URL': api_url,
+        'UPSTREAM_BASE_URL': upstream_url,
+        'METRICS_PORT': '0',
+        'SEND_GLOBAL_RATE': '1000000',
+        'SEND_CHAT_RATE': '1000000',
+        'SEND_CHAT_BURST': '1000000',
+    })
+    import bot as app  # noqa: E402
+    from database import Database  # noqa: E402
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            database = Database(os.path.join(tmp, 'load.db'), task_cache=True)
+            app.create_bot(TOKEN, api_url, database)
+            app.start_workers()
+            polling = threading.Thread(
+                target=app.bot.infinity_polling,
+                kwargs={'timeout': 5, 'long_polling_timeout': 1},
+                daemon=True,
+            )
+            polling.start()
+
+            cpu_start = time.process_time()
+            wall_start = time.monotonic()
+            control(api_url, 'start', rate=rate, duration=duration, chats=chats)
+            deadline = wall_start + duration + 60
+            while True:
+                time.sleep(0.5)
+                stats = control(api_url, 'stats')
+                if not stats['generating'] and stats['pending'] == 0:
+                    break
+                if time.monotonic() > deadline:
+                    print(f"timeout: {stats['pending']} updates without a reply")
+                    break
+            cpu = time.process_time() - cpu_start
+            wall = time.monotonic() - wall_start
+
+            app.bot.stop_polling()
+            app.sender.stop()
+            if app.dispatcher is not None:
+                app.dispatcher.stop()
+            database.close()
+    finally:
+        api_process.kill()
+        upstream_process.kill()
+
+    latency = stats['latency']
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'target {rate:.0f} updates/s for {duration:.0f}s, {chats} chats, '
+          f'upstream latency {rates_latency * 1000:.0f}/{weather_latency * 1000:.0f} ms')
+    print(f"generated {stats['generated']}, replies {stats['replies']}, unexpected {stats['unexpected']}")
+    print(f"throughput {stats['replies'] / stats['elapsed']:.1f} replies/s")
+    if latency['count']:
+        print(f"latency p50 {latency['p50_ms']:.1f} ms  p95 {latency['p95_ms']:.1f} ms  "
+              f"p99 {latency['p99_ms']:.1f} ms")
+    print(f'cpu {cpu:.2f}s ({cpu / wall * 100:.0f}% of one core), peak rss {rss:.0f} MiB')
+    print(f"{'command':>34} {'count':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for command, summary in sorted(stats['by_command'].items()):
+        print(f"{command:>34} {summary['count']:>7} {summary['p50_ms']:>8.1f} {summary['p99_ms']:>8.1f}")
+    if stats['unexpected'] or stats['pending']:
+        print(f"FAIL: {stats['unexpected']} unexpected replies, {stats['pending']} updates without a reply")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Бенчмарк накладных расходов инструментирования.
+
+Сравнивает пустую функцию с той же функцией под декоратором timed,
+стоимость observe() из нескольких потоков, задержку чтения задач
+с метриками и без (кэш задач включен, чтобы доля метрик была заметнее)
+и время отдачи /metrics.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_metrics
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from utils.metrics import HANDLER_SECONDS, registry, start_metrics_server, timed  # noqa: E402
+
+CALLS = 200_000
+
+
+def per_call_ns(func, calls=CALLS):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def observe_threads(threads):
+    histogram = HANDLER_SECONDS.labels('bench_threads')
+    calls = CALLS // threads
+
+    def work():
+        for i in range(calls):
+            histogram.observe(i * 1e-6)
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (calls * threads) * 1e9
+
+
+def main():
+    def handler():
+        return None
+
+    print(f'plain call          {per_call_ns(handler):>8.0f} ns')
+    print(f'timed call          {per_call_ns(timed(HANDLER_SECONDS, "bench")(handler)):>8.0f} ns')
+    for threads in (1, 8):
+        print(f'observe, {threads} threads  {observe_threads(threads):>8.0f} ns')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), task_cache=True)
+        for i in range(50):
+            db.add_task(1, f'задача {i}')
+        plain = Database.get_user_tasks.__wrapped__
+        print(f'get_user_tasks raw  {per_call_ns(lambda: plain(db, 1), 50_000):>8.0f} ns')
+        print(f'get_user_tasks      {per_call_ns(lambda: db.get_user_tasks(1), 50_000):>8.0f} ns')
+        db.close()
+
+    server = start_metrics_server('127.0.0.1', 0)
+    url = f'http://127.0.0.1:{server.server_port}/metrics'
+    start = time.perf_counter()
+    body = urllib.request.urlopen(url).read()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f'/metrics            {elapsed:>8.2f} ms, {len(body)} bytes, {len(registry.render().splitlines())} lines')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Задержка /currency с фоновым обновлением популярных баз и без него.
+
+Загрузчик таблицы курсов имитирует провайдера с задержкой; TTL кэша
+укорочен, чтобы за прогон таблицы успели устареть несколько раз, а в
+таблице только целевая валюта, чтобы кросс-курсы из чужих таблиц не
+скрывали промахи. Поток запросов - несколько горячих баз и длинный
+хвост редких. Без фонового обновления каждый выход таблицы за TTL стоит
+запросу полной задержки провайдера, с обновлением горячие базы всегда
+свежие.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_prefetch [секунд] [задержка_провайдера]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.prefetcher import RatePrefetcher  # noqa: E402
+from utils.rate_cache import RateCache  # noqa: E402
+
+HOT = ('USD', 'EUR', 'RUB', 'CNY')
+TAIL = ('GBP', 'JPY', 'CHF', 'TRY', 'KZT', 'BYN', 'PLN', 'SEK', 'NOK', 'INR')
+TTL = 0.5
+REQUEST_GAP = 0.001
+
+
+def run(duration, latency, prefetch):
+    upstream = {'calls': 0}
+
+    def loader(base):
+        upstream['calls'] += 1
+        time.sleep(latency)
+        return {'USD': 1.0}
+
+    cache = RateCache(ttl=TTL, log_every=0)
+    prefetcher = RatePrefetcher(cache, loader, top_n=len(HOT), interval=TTL / 2)
+    if prefetch:
+        for base in HOT:
+            prefetcher.record(base)
+        prefetcher.start()
+
+    rng = random.Random(1)
+    hot, tail = [], []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        is_hot = rng.random() < 0.9
+        base = rng.choice(HOT if is_hot else TAIL)
+        start = time.perf_counter()
+        rate = cache.get_rate(base, 'USD')
+        if rate is None:
+            cache.fetch(base, loader)
+        prefetcher.record(base)
+        (hot if is_hot else tail).append(time.perf_counter() - start)
+        time.sleep(REQUEST_GAP)
+    prefetcher.stop()
+    return hot, tail, upstream['calls']
+
+
+def describe(values):
+    values = sorted(values)
+    p99 = values[min(len(values) - 1, int(len(values) * 0.99))]
+    slow = sum(1 for value in values if value > 0.001)
+    return (
+        f'p50 {statistics.median(values) * 1e6:>6.1f} мкс  p99 {p99 * 1e3:>6.2f} мс  '
+        f'max {values[-1] * 1e3:>6.2f} мс  дольше 1 мс: {slow}'
+    )
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5.0
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    for label, prefetch in (('по требованию', False), ('фоновое обновление', True)):
+        hot, tail, calls = run(duration, latency, prefetch)
+        print(f'{label}: запросов к провайдеру {calls}')
+        print(f'{"горячие базы":>16} {describe(hot)}')
+        print(f'{"редкие базы":>16} {describe(tail)}')
+
+
+if __name__ == '__main__':
+    main()
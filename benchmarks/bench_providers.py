@@ -0,0 +1,156 @@
+"""Хеджирование запросов к провайдерам курсов на локальных заглушках.
+
+Четыре заглушки: "down", всегда отвечающая 500, "slow" с хвостом
+задержек, "flaky" с частыми ошибками 500 и "steady". Сравниваются
+прежний перебор провайдеров по порядку и ProviderSelector с
+хеджированием и предохранителями; проверяется, что хеджирование
+срабатывает на "slow", "down" почти не получает запросов, хвост задержек
+у ProviderSelector короче, а предохранитель "down" после серии ошибок
+размыкается и провайдер пропускается.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_providers [запросов]
+"""
+import json
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import helpers  # noqa: E402
+from utils.providers import ProviderSelector  # noqa: E402
+
+# имя: (базовая задержка, вероятность хвоста 1с, вероятность ошибки)
+STUBS = {
+    'down': (0.005, 0.0, 1.0),
+    'slow': (0.05, 0.3, 0.0),
+    'flaky': (0.01, 0.0, 0.6),
+    'steady': (0.08, 0.0, 0.0),
+}
+
+
+# запросов, дошедших до каждой заглушки
+hits = Counter()
+
+
+class InOrder:
+    """Прежний перебор: провайдеры по порядку списка, до первого ответа"""
+
+    def race(self, calls):
+        for _, func in calls:
+            try:
+                value = func()
+            except Exception:
+                value = None
+            if value is not None:
+                return value
+        return None
+
+    def snapshot(self):
+        return {}
+
+
+def make_handler(name, delay, tail, error_rate):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            hits[name] += 1
+            time.sleep(1.0 if random.random() < tail else delay)
+            if random.random() < error_rate:
+                status, body = 500, b'{}'
+            else:
+                status, body = 200, json.dumps({'rates': {'EUR': 0.92}}).encode()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return StubHandler
+
+
+def start_stubs():
+    apis = []
+    for name, params in STUBS.items():
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(name, *params))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        apis.append({
+            'name': name,
+            'url': f'http://127.0.0.1:{server.server_port}/latest/{{base}}',
+            'parse_func': lambda data, to_curr: data.get('rates', {}).get(to_curr),
+            'rates_func': lambda data: data.get('rates'),
+        })
+    return apis
+
+
+def run(label, selector, total):
+    helpers.provider_selector = selector
+    hits.clear()
+    latencies = []
+    failed = 0
+    for _ in range(total):
+        start = time.perf_counter()
+        if helpers.fetch_rate_table('USD') is None:
+            failed += 1
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f'{label:>10}  p50 {statistics.median(latencies) * 1000:>7.1f} ms  '
+        f'p99 {p99 * 1000:>7.1f} ms  failed {failed}  '
+        f"hits {', '.join(f'{name}={hits[name]}' for name in STUBS)}"
+    )
+    snapshot = selector.snapshot()
+    for name, stats in snapshot.items():
+        latency = stats['latency_ewma'] or 0.0
+        print(
+            f"{'':>10}  {name:>7}: ewma {latency * 1000:>7.1f} ms, "
+            f"errors {stats['error_rate']:.2f}, hedged {stats['hedged']}, "
+            f"circuit opened {stats['circuit_opened']}"
+        )
+    return p99, dict(hits), snapshot
+
+
+def check_breaker(apis, selector):
+    """Только "down": серия ошибок размыкает предохранитель, дальше он пропускается"""
+    helpers.provider_selector = selector
+    helpers.EXCHANGE_RATE_APIS = [api for api in apis if api['name'] == 'down']
+    for _ in range(selector.failure_threshold):
+        helpers.fetch_rate_table('USD')
+    helpers.EXCHANGE_RATE_APIS = [api for api in apis if api['name'] in ('down', 'steady')]
+    hits.clear()
+    for _ in range(10):
+        assert helpers.fetch_rate_table('USD') is not None
+    stats = selector.snapshot()['down']
+    print(f"   breaker  down: circuit opened {stats['circuit_opened']}, open={stats['circuit_open']}, "
+          f"hits while open {hits['down']}")
+    assert stats['circuit_opened'] == 1 and stats['circuit_open'], stats
+    assert hits['down'] == 0, hits
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    random.seed(1)
+    apis = helpers.EXCHANGE_RATE_APIS = start_stubs()
+    in_order_p99, in_order_hits, _ = run('in order', InOrder(), total)
+    hedged_p99, hedged_hits, snapshot = run('hedged', ProviderSelector(min_delay=0.02, max_delay=0.3), total)
+
+    assert in_order_hits['down'] == total, in_order_hits
+    assert snapshot['slow']['hedged'] > 0, 'хеджирование не сработало на медленной заглушке'
+    assert hedged_hits['down'] < total // 10, hedged_hits
+    assert hedged_p99 < in_order_p99, (hedged_p99, in_order_p99)
+    check_breaker(apis, ProviderSelector(min_delay=0.02, max_delay=0.3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Накладные расходы RateLimiter на одно сообщение и память на миллионы чатов.
+
+Замеры: проверка общего лимита и лимита группы для случайных
+пользователей из большого пула (промахи по кэшу CPU, рост словаря),
+проверка одного пользователя, упершегося в лимит, объем состояния
+на ключ (tracemalloc) и время смены поколения.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_ratelimit [пользователей] [проверок]
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ratelimit import RateLimiter, parse_limits  # noqa: E402
+
+LIMITS = '*:30/60,weather:5/60,currency:10/60,todo:20/60'
+
+
+def per_check(label, calls, checks):
+    start = time.perf_counter()
+    for user_id, group in calls:
+        checks(user_id, group)
+    elapsed = time.perf_counter() - start
+    print(f'{label:>34} {elapsed / len(calls) * 1e9:>7.0f} ns/проверка')
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    checks = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    limits = parse_limits(LIMITS)
+    rng = random.Random(1)
+    groups = ['*', '*', 'weather', 'currency', 'todo']
+
+    limiter = RateLimiter(limits)
+    count, _ = limits['weather']
+    allowed = sum(1 for _ in range(count * 3) if not limiter.check(42, 'weather'))
+    assert allowed == count, allowed
+
+    calls = [(rng.randrange(users), rng.choice(groups)) for _ in range(checks)]
+    limiter = RateLimiter(limits)
+    per_check('случайные пользователи (пустой)', calls, limiter.check)
+    per_check('случайные пользователи (прогретый)', calls, limiter.check)
+    hot = [(7, 'weather')] * checks
+    per_check('один пользователь сверх лимита', hot, limiter.check)
+    per_check('пустой цикл (для сравнения)', calls, lambda user_id, group: None)
+    print(f'{"":>34} {limiter.stats()}')
+
+    tracemalloc.start()
+    limiter = RateLimiter(limits)
+    before = tracemalloc.get_traced_memory()[0]
+    for user_id in range(users):
+        limiter.check(user_id)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f'\n{users} пользователей: {used / 2 ** 20:.1f} МБ, {used / users:.0f} байт на ключ')
+
+    start = time.perf_counter()
+    limiter._rotate(time.monotonic())
+    limiter._rotate(time.monotonic())
+    print(f'смена двух поколений: {(time.perf_counter() - start) * 1e3:.1f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Напоминания при 1M отложенных: колесо таймеров и запросы к БД.
+
+Колесо: стоимость schedule() и память на 1M таймеров со сроками в
+ближайшие window секунд, затем реальный прогон в течение duration секунд
+с шагом tick - опоздание срабатываний относительно срока (не раньше
+срока, не позже чем через tick плюс задержка потока) и время advance().
+
+БД: 1M задач со сроками в ближайшие сутки в SQLite; подгрузка окна
+в час через iter_reminders (частичный индекс по due_at) и отметка
+пачки из 1000 сработавших через claim_reminders.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_reminders [напоминаний] [секунд_прогона]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from utils.timer_wheel import TimerWheel  # noqa: E402
+
+TICK = 0.01
+WINDOW = 600
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda share: values[min(len(values) - 1, int(len(values) * share))]  # noqa: E731
+    return f'p50 {pick(0.5) * 1e3:.2f} мс  p99 {pick(0.99) * 1e3:.2f} мс  max {values[-1] * 1e3:.2f} мс'
+
+
+def fill(dues):
+    wheel = TimerWheel(TICK)
+    for task_id, due in enumerate(dues):
+        wheel.schedule(due, (task_id, task_id))
+    return wheel
+
+
+def bench_wheel(total, duration):
+    rng = random.Random(1)
+    # шкала колеса отсчитывается от начала прогона, а не от начала заполнения
+    dues = [0.05 + rng.random() * WINDOW for _ in range(total)]
+
+    tracemalloc.start()
+    measured = fill(dues)
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del measured
+
+    start = time.perf_counter()
+    wheel = fill(dues)
+    elapsed = time.perf_counter() - start
+    print(f'schedule: {elapsed / total * 1e9:.0f} ns/таймер, {used / 2 ** 20:.0f} МБ '
+          f'({used / total:.0f} байт на таймер)')
+
+    lateness, advances = [], []
+    origin = time.perf_counter()
+    next_tick = 0.0
+    while next_tick < duration:
+        next_tick += TICK
+        pause = next_tick - (time.perf_counter() - origin)
+        if pause > 0:
+            time.sleep(pause)
+        start = time.perf_counter()
+        fired = wheel.advance(start - origin)
+        advances.append(time.perf_counter() - start)
+        fired_at = time.perf_counter() - origin
+        lateness.extend(fired_at - due for due, _ in fired)
+    assert min(lateness) >= 0, min(lateness)
+    print(f'прогон {duration:.0f} с, tick {TICK * 1e3:.0f} мс: сработало {len(lateness)}, '
+          f'в колесе осталось {len(wheel)}')
+    print(f'  опоздание: {percentiles(lateness)}')
+    print(f'  advance:   {percentiles(advances)}, среднее {statistics.fmean(advances) * 1e6:.0f} мкс')
+
+
+def bench_database(total):
+    rng = random.Random(2)
+    now = int(time.time())
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        with db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO tasks (user_id, task_text, due_at) VALUES (?, ?, ?)',
+                ((rng.randrange(100_000), 'позвонить', now + rng.randrange(86400)) for _ in range(total)),
+            )
+            conn.commit()
+        print(f'\nБД: {total} задач со сроком вставлено за {time.perf_counter() - start:.1f} с')
+
+        start = time.perf_counter()
+        window = [(row['user_id'], row['id']) for row in db.iter_reminders(0, now + 3600)]
+        elapsed = time.perf_counter() - start
+        print(f'  окно 1 ч: {len(window)} напоминаний за {elapsed * 1e3:.0f} мс '
+              f'({elapsed / len(window) * 1e6:.1f} мкс на строку)')
+
+        start = time.perf_counter()
+        claimed = db.claim_reminders(window[:1000])
+        print(f'  claim 1000: {(time.perf_counter() - start) * 1e3:.1f} мс, отмечено {len(claimed)}')
+        db.close()
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    bench_wheel(total, duration)
+    bench_database(total)
+
+
+if __name__ == '__main__':
+    main()
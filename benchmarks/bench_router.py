@@ -0,0 +1,171 @@
+"""Бенчмарк разбора команд: таблица CommandRouter против цепочки фильтров.
+
+Старый путь воспроизводит то, что делал бот: перебор обработчиков
+с проверкой фильтра команд (как в pyTelegramBotAPI - extract_command
+на каждый обработчик), затем разбор аргументов через split/replace
+и каскады if/elif внутри обработчика. Новый путь - один
+CommandRouter.resolve. Побочных действий нет, сравнивается только
+стоимость выбора обработчика и разбора аргументов на реалистичной смеси.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_router
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.router import ANY, REST, WORDS, ArgumentError, CommandRouter, upper  # noqa: E402
+
+UPDATES = 200_000
+
+MIX = (
+    ('/todo', 10), ('/todo list', 10), ('/todo add купить молоко и хлеб', 15),
+    ('/todo delete 17', 5), ('/currency 100 USD RUB', 15), ('/weather Санкт-Петербург', 15),
+    ('Мои задачи', 8), ('Погода', 4), ('Конвертер', 3), ('/random number 1 100', 5),
+    ('/random choice пицца суши паста', 4), ('/help', 2), ('/start', 1), ('привет', 3),
+)
+
+
+def extract_command(text):
+    """Как telebot.util.extract_command"""
+    if text is None or not text.startswith('/'):
+        return None
+    return text.split()[0].split('@')[0][1:]
+
+
+def legacy_todo(text):
+    if text.strip() == '/todo':
+        return 'list', ()
+    parts = text.split(maxsplit=2)
+    if len(parts) < 2:
+        return 'list', ()
+    action = parts[1].lower()
+    if action == 'add':
+        return ('add', (parts[2],)) if len(parts) > 2 and parts[2].strip() else ('usage', ())
+    if action == 'list':
+        return 'list', ()
+    if action == 'delete':
+        try:
+            return ('delete', (int(parts[2]),)) if len(parts) > 2 else ('usage', ())
+        except ValueError:
+            return 'invalid', ()
+    return 'unknown', ()
+
+
+def legacy_currency(text):
+    parts = text.split()
+    if len(parts) != 4:
+        return 'usage', ()
+    return 'currency', (float(parts[1]), parts[2].upper(), parts[3].upper())
+
+
+def legacy_weather(text):
+    parts = text.split(maxsplit=1)
+    return ('weather', (parts[1],)) if len(parts) > 1 else ('usage', ())
+
+
+def legacy_random(text):
+    if text.strip() == '/random':
+        return 'options', ()
+    parts = text.replace('/random', '').strip().split()
+    if not parts:
+        return 'options', ()
+    action = parts[0].lower()
+    if action == 'number' and len(parts) == 3:
+        return 'number', (int(parts[1]), int(parts[2]))
+    if action == 'choice':
+        return 'choice', (parts[1:],)
+    return 'options', ()
+
+
+def legacy_text(text):
+    text = text.strip()
+    if text == 'Мои задачи':
+        return 'list', ()
+    elif text == 'Конвертер':
+        return 'converter', ()
+    elif text == 'Погода':
+        return 'weather_hint', ()
+    elif text == 'Случайность':
+        return 'options', ()
+    return 'unknown', ()
+
+
+# Порядок регистрации обработчиков в старом bot.py
+LEGACY_HANDLERS = (
+    (['start'], lambda text: ('start', ())),
+    (['help'], lambda text: ('help', ())),
+    (['todo'], legacy_todo),
+    (['currency'], legacy_currency),
+    (['weather'], legacy_weather),
+    (['random'], legacy_random),
+    (None, legacy_text),
+)
+
+
+def legacy_dispatch(text):
+    for commands, handler in LEGACY_HANDLERS:
+        if commands is None or extract_command(text) in commands:
+            return handler(text)
+
+
+def build_router():
+    router = CommandRouter()
+
+    def route(name):
+        def handler(message, *args):
+            return name
+        return handler
+
+    router.command('start')(route('start'))
+    router.command('help')(route('help'))
+    router.command('todo')(route('list'))
+    router.command('todo', 'list')(route('list'))
+    router.command('todo', 'add', params=(REST,), usage='usage')(route('add'))
+    router.command('todo', 'delete', params=(int,), usage='usage', invalid='invalid')(route('delete'))
+    router.command('todo', ANY)(route('unknown'))
+    router.command('currency', params=(float, upper, upper), usage='usage', invalid='invalid')(route('currency'))
+    router.command('weather', params=(REST,), usage='usage')(route('weather'))
+    router.command('random', 'number', params=(int, int), usage='usage', invalid='invalid')(route('number'))
+    router.command('random', 'choice', params=(WORDS,))(route('choice'))
+    router.command('random')(route('options'))
+    router.command('random', ANY)(route('options'))
+    router.button('Мои задачи')(route('list'))
+    router.button('Конвертер')(route('converter'))
+    router.button('Погода')(route('weather_hint'))
+    router.button('Случайность')(route('options'))
+    router.fallback(route('unknown'))
+    return router
+
+
+def router_dispatch(router, text):
+    try:
+        handler, args = router.resolve(text)
+    except ArgumentError as e:
+        return e.text, ()
+    return handler(None), tuple(args)
+
+
+def main():
+    texts = [text for text, weight in MIX for _ in range(weight)]
+    rng = random.Random(1)
+    updates = [rng.choice(texts) for _ in range(UPDATES)]
+    router = build_router()
+
+    for text in dict.fromkeys(updates):
+        assert legacy_dispatch(text) == router_dispatch(router, text), text
+
+    for label, dispatch in (('if/elif chain', legacy_dispatch),
+                            ('router table', lambda text: router_dispatch(router, text))):
+        start = time.perf_counter()
+        for text in updates:
+            dispatch(text)
+        elapsed = time.perf_counter() - start
+        print(f'{label:>14} {elapsed / UPDATES * 1e9:>8.0f} ns/update')
+
+
+if __name__ == '__main__':
+    main()
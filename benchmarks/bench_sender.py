@@ -0,0 +1,112 @@
+"""MessageSender против поддельного Bot API, который соблюдает лимиты.
+
+FakeBotAPI отвечает ошибкой 429 с retry_after, если превышен общий
+или поличатовый лимит в скользящем окне 1 секунда. Сравниваются прямые
+отправки из потоков обработчиков и очередь MessageSender.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_sender
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sender import MessageSender  # noqa: E402
+
+GLOBAL_LIMIT = 100
+CHAT_LIMIT = 5
+API_LATENCY = 0.02
+CHATS = 40
+REPLIES = 400
+BROADCASTS = 200
+
+
+class FakeApiError(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f'Too Many Requests: retry after {retry_after}')
+        self.error_code = 429
+        self.result_json = {'parameters': {'retry_after': retry_after}}
+
+
+class FakeBotAPI:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.global_window = deque()
+        self.chat_windows = defaultdict(deque)
+        self.delivered = defaultdict(list)
+        self.rejected = 0
+
+    def send_message(self, chat_id, text, **kwargs):
+        time.sleep(API_LATENCY)
+        with self.lock:
+            now = time.monotonic()
+            for window in (self.global_window, self.chat_windows[chat_id]):
+                while window and now - window[0] > 1:
+                    window.popleft()
+            if len(self.global_window) >= GLOBAL_LIMIT or len(self.chat_windows[chat_id]) >= CHAT_LIMIT:
+                self.rejected += 1
+                raise FakeApiError(retry_after=1)
+            self.global_window.append(now)
+            self.chat_windows[chat_id].append(now)
+            self.delivered[chat_id].append(text)
+
+
+def messages():
+    return [(i % CHATS, f'reply {i:05d}') for i in range(REPLIES)]
+
+
+def run_direct():
+    api = FakeBotAPI()
+    lost = 0
+
+    def send(item):
+        nonlocal lost
+        try:
+            api.send_message(*item)
+        except FakeApiError:
+            lost += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(send, messages()))
+    print(f'direct   {time.perf_counter() - start:>6.2f} s  rejected {api.rejected:>4}  lost {lost}')
+
+
+def run_queued():
+    api = FakeBotAPI()
+    # за любую секунду уходит не больше burst + rate сообщений
+    sender = MessageSender(
+        api.send_message, global_rate=GLOBAL_LIMIT / 2, global_burst=GLOBAL_LIMIT / 2,
+        chat_rate=CHAT_LIMIT / 2, chat_burst=CHAT_LIMIT // 2, workers=16,
+    ).start()
+
+    start = time.perf_counter()
+    sender.broadcast(range(CHATS, CHATS + BROADCASTS), 'broadcast')
+    enqueue_start = time.perf_counter()
+    for chat_id, text in messages():
+        sender.send(chat_id, text)
+    enqueue_us = (time.perf_counter() - enqueue_start) / REPLIES * 1e6
+    sender.stop(timeout=120)
+    elapsed = time.perf_counter() - start
+
+    ordered = all(
+        texts == sorted(texts) for chat_id, texts in api.delivered.items() if chat_id < CHATS
+    )
+    stats = sender.stats()
+    print(
+        f'queued   {elapsed:>6.2f} s  rejected {api.rejected:>4}  failed {stats["failed"]}  '
+        f'enqueue {enqueue_us:.1f} us  latency avg {stats["latency_avg"] * 1000:.0f} ms  '
+        f'max {stats["latency_max"] * 1000:.0f} ms  per-chat order kept: {ordered}'
+    )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.ERROR)
+    run_direct()
+    run_queued()
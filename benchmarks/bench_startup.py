@@ -0,0 +1,101 @@
+"""Бенчмарк холодного старта процесса бота.
+
+Каждый замер - новый процесс интерпретатора в пустом временном каталоге
+(своя база данных): время `import bot`, `create_bot()` и первого запроса
+к базе, где ленивая инициализация применяет миграции. Отдельный прогон
+`python -X importtime` показывает модули, дольше всего импортирующиеся
+при `import bot`. Старт (импорт + create_bot) сравнивается с бюджетом.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_startup [бюджет_мс]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNS = 7
+TOP_IMPORTS = 15
+# Бюджет холодного старта: import bot + create_bot() до готовности принимать апдейты
+STARTUP_BUDGET_MS = 300
+
+PROBE = '''
+import json, time
+start = time.perf_counter()
+import bot
+imported = time.perf_counter()
+bot.create_bot()
+created = time.perf_counter()
+bot.db.get_user_tasks(0)
+queried = time.perf_counter()
+print(json.dumps({
+    'import': (imported - start) * 1000,
+    'create_bot': (created - imported) * 1000,
+    'first_query': (queried - created) * 1000,
+}))
+'''
+
+
+def child_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    env.setdefault('BOT_TOKEN', '123456:startup-benchmark')
+    return env
+
+
+def run_probe(workdir):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=workdir, env=child_env(),
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_times(workdir):
+    """(cumulative_us, self_us, модуль) из отчета -X importtime для import bot"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import bot'], cwd=workdir,
+        env=child_env(), capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else STARTUP_BUDGET_MS
+    with tempfile.TemporaryDirectory() as workdir:
+        # первый прогон прогревает .pyc и файловый кэш ОС, в замер не входит
+        run_probe(workdir)
+        samples = []
+        for _ in range(RUNS):
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            samples.append(run_probe(workdir))
+        rows = import_times(workdir)
+
+    print(f'Самые долгие импорты при import bot (из {len(rows)} модулей):')
+    print(f'{"cumulative, мс":>15} {"self, мс":>9}  модуль')
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:TOP_IMPORTS]:
+        print(f'{cumulative_us / 1000:>15.1f} {self_us / 1000:>9.1f}  {name}')
+
+    print(f'\nМедиана по {RUNS} процессам:')
+    for stage in ('import', 'create_bot', 'first_query'):
+        print(f'{stage:>12} {statistics.median(sample[stage] for sample in samples):>8.1f} мс')
+    startup = statistics.median(sample['import'] + sample['create_bot'] for sample in samples)
+    verdict = 'OK' if startup <= budget else 'ПРЕВЫШЕН'
+    print(f'\nСтарт (import + create_bot): {startup:.1f} мс, бюджет {budget:.0f} мс - {verdict}')
+    if startup > budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
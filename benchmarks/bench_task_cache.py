@@ -0,0 +1,87 @@
+"""Бенчмарк кэша списков задач: чтение для «горячих» пользователей.
+
+Засевает задачи для множества пользователей, затем читает список и первую
+страницу задач с перекосом к небольшой группе активных пользователей
+(80% обращений к 1% пользователей), перемежая чтения добавлениями.
+Сравнивает задержку с кэшем и без него отдельно для активных и остальных.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_task_cache [пользователей] [задач_на_пользователя]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+OPERATIONS = 20000
+WRITE_SHARE = 0.02
+
+
+def seed(db, users, per_user):
+    with db.get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO tasks (user_id, task_text) VALUES (?, ?)',
+            ((i % users, f'задача {i}') for i in range(users * per_user)),
+        )
+        conn.commit()
+
+
+def workload(users):
+    hot = max(1, users // 100)
+    rng = random.Random(1)
+    ops = []
+    for _ in range(OPERATIONS):
+        user_id = rng.randrange(hot) if rng.random() < 0.8 else rng.randrange(hot, users)
+        ops.append(('add' if rng.random() < WRITE_SHARE else rng.choice(('list', 'page')), user_id))
+    return ops, hot
+
+
+def run(db, ops, hot):
+    latencies = {}
+    for kind, user_id in ops:
+        if kind == 'add':
+            db.add_task(user_id, 'новая задача')
+            continue
+        start = time.perf_counter()
+        if kind == 'list':
+            db.get_user_tasks(user_id)
+        else:
+            db.get_user_tasks_page(user_id)
+        group = 'hot' if user_id < hot else 'cold'
+        latencies.setdefault(f'{group} {kind}', []).append(time.perf_counter() - start)
+    return latencies
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))] * 1e6
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ops, hot = workload(users)
+    print(f'{users} users x {per_user} tasks, {OPERATIONS} operations')
+    print(f"{'mode':>10} {'op':>10} {'p50 us':>8} {'p99 us':>8} {'avg us':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        seed(Database(path), users, per_user)
+        for label, cached in (('sqlite', False), ('cache', True)):
+            db = Database(path, task_cache=cached)
+            latencies = run(db, ops, hot)
+            for kind, values in sorted(latencies.items()):
+                avg = sum(values) / len(values) * 1e6
+                print(f'{label:>10} {kind:>10} {percentile(values, 0.5):>8.1f} '
+                      f'{percentile(values, 0.99):>8.1f} {avg:>8.1f}')
+            if db.task_cache is not None:
+                print(f'{"":>10} stats {db.task_cache.stats()}')
+            db.close()
+
+
+if __name__ == '__main__':
+    main()
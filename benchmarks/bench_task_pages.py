@@ -0,0 +1,78 @@
+"""Вывод списка задач пользователя с 10k задач: весь список против страниц.
+
+Старый способ - get_user_tasks + склейка строк через +=, новый -
+keyset-страница get_user_tasks_page + format_tasks_page.
+Сравниваются время и пик памяти (tracemalloc).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_task_pages [задач]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from utils.messages import format_tasks_page  # noqa: E402
+
+USER_ID = 42
+REPEAT = 20
+
+
+def render_all(db):
+    tasks = db.get_user_tasks(USER_ID)
+    tasks_text = '📝 *Ваши задачи:*\n\n'
+    for task in tasks:
+        tasks_text += f"{task['id']}. {task['task_text']}\n"
+    return tasks_text
+
+
+def render_first_page(db):
+    tasks, _ = db.get_user_tasks_page(USER_ID)
+    return format_tasks_page(tasks)[0]
+
+
+def walk_pages(db):
+    cursor, pages = None, 0
+    while True:
+        tasks, has_more = db.get_user_tasks_page(USER_ID, cursor)
+        format_tasks_page(tasks)
+        pages += 1
+        if not has_more:
+            return pages
+        cursor = (tasks[-1]['created_at'], tasks[-1]['id'])
+
+
+def measure(label, func, db):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func(db)
+    elapsed = (time.perf_counter() - start) / REPEAT
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = len(result) if isinstance(result, str) else f'{result} pages'
+    print(f'{label:>12} {elapsed * 1000:>8.2f} ms  peak {peak / 1024:>8.0f} KiB  result {size}')
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        with db.get_connection() as conn:
+            conn.executemany(
+                'INSERT INTO tasks (user_id, task_text) VALUES (?, ?)',
+                ((USER_ID, f'купить молоко и хлеб, задача номер {i}') for i in range(total)),
+            )
+            conn.commit()
+        measure('full list', render_all, db)
+        measure('first page', render_first_page, db)
+        measure('all pages', walk_pages, db)
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Бенчмарк выборки задач пользователя при росте таблицы tasks.
+
+Засевает до 1M задач на 100k пользователей и сравнивает задержку
+get_user_tasks с индексом idx_tasks_user_created и без него.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_user_tasks [всего_задач] [пользователей]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+QUERIES = 2000
+
+
+def seed(db, start, count, users):
+    with db.get_connection() as conn:
+        conn.executemany(
+            'INSERT INTO tasks (user_id, task_text) VALUES (?, ?)',
+            ((i % users, f'задача {i}') for i in range(start, start + count)),
+        )
+        conn.commit()
+
+
+def list_latency_us(db, users):
+    user_ids = [random.randrange(users) for _ in range(QUERIES)]
+    start = time.perf_counter()
+    for user_id in user_ids:
+        db.get_user_tasks(user_id)
+    return (time.perf_counter() - start) / QUERIES * 1e6
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    steps = [total // 10, total // 2, total]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        print(f'query plan uses index: {db.check_query_plan()}')
+        print(f"{'tasks':>10} {'indexed us':>12} {'no index us':>12}")
+        seeded = 0
+        for step in steps:
+            seed(db, seeded, step - seeded, users)
+            seeded = step
+            indexed = list_latency_us(db, users)
+            # индекс пересоздается тем же выражением: миграции не повторяются (ALTER TABLE)
+            with db.get_connection() as conn:
+                index_sql = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = 'idx_tasks_user_created'"
+                ).fetchone()[0]
+                conn.execute('DROP INDEX idx_tasks_user_created')
+                conn.commit()
+            plain = list_latency_us(db, users)
+            with db.get_connection() as conn:
+                conn.execute(index_sql)
+                conn.commit()
+            print(f'{step:>10} {indexed:>12.1f} {plain:>12.1f}')
+        db.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Задержка /weather с холодным и прогретым кэшем геокодинга и прогнозов.
+
+Мок-сервер отвечает на /v1/search (геокодинг) и /v1/forecast
+с искусственной задержкой и считает обращения к каждому пути.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_weather [запросов]
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from utils import helpers  # noqa: E402
+from utils.geocache import GeoCache  # noqa: E402
+
+UPSTREAM_DELAY = 0.03
+CITIES = ['Тула', 'Рязань', 'Тверь', 'Курск', 'Орёл', 'Смоленск', 'Псков', 'Иваново']
+hits = Counter()
+
+
+class MockOpenMeteoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        hits[path] += 1
+        time.sleep(UPSTREAM_DELAY)
+        if path.endswith('/search'):
+            payload = {'results': [{'name': 'Город', 'latitude': 54.19, 'longitude': 37.61}]}
+        else:
+            payload = {'current_weather': {'temperature': 12.5, 'weathercode': 2}}
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockOpenMeteoHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    helpers.GEO_URL = f'{base}/v1/search'
+    helpers.WEATHER_URL = f'{base}/v1/forecast'
+    return server
+
+
+def measure(label, total):
+    hits.clear()
+    latencies = []
+    for i in range(total):
+        start = time.perf_counter()
+        helpers.get_weather(CITIES[i % len(CITIES)])
+        latencies.append(time.perf_counter() - start)
+    print(
+        f'{label:>6}  p50 {statistics.median(latencies) * 1000:>6.1f} ms  '
+        f'max {max(latencies) * 1000:>6.1f} ms  upstream {dict(hits)}'
+    )
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else len(CITIES)
+    server = start_mock_server()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'))
+        helpers.geo_cache = GeoCache(offline=False, store=db)
+        measure('cold', total)
+        measure('warm', total)
+        helpers.geo_cache = GeoCache(offline=False, store=db)
+        measure('sqlite', total)
+        db.close()
+    print(f'forecast cache: {helpers.forecast_cache.stats()}')
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
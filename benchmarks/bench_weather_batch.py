@@ -0,0 +1,90 @@
+"""Пакетирование запросов погоды: число обращений к мок-серверу Open-Meteo.
+
+Много потоков одновременно запрашивают погоду для разных точек
+(в обход кэша прогнозов); сравниваются запросы по одному и пачками.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_weather_batch [запросов] [потоков]
+"""
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from utils import helpers  # noqa: E402
+from utils.batcher import RequestBatcher  # noqa: E402
+
+UPSTREAM_DELAY = 0.05
+upstream_hits = 0
+
+
+class MockForecastHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        global upstream_hits
+        upstream_hits += 1
+        time.sleep(UPSTREAM_DELAY)
+        query = parse_qs(urlparse(self.path).query)
+        latitudes = query['latitude'][0].split(',')
+        items = [{'current_weather': {'temperature': float(lat), 'weathercode': 0}} for lat in latitudes]
+        body = json.dumps(items if len(items) > 1 else items[0]).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(label, window, total, workers):
+    global upstream_hits
+    upstream_hits = 0
+    Config.WEATHER_BATCH_WINDOW = window
+    helpers.weather_batcher = RequestBatcher(
+        helpers.fetch_current_weather_many, window=window or 0.03, max_size=Config.WEATHER_BATCH_SIZE
+    )
+
+    def one(i):
+        start = time.perf_counter()
+        latitude = 40 + i % 500 / 10
+        weather = helpers.fetch_current_weather(latitude, 30.0)
+        assert weather['temperature'] == latitude
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - start
+    print(
+        f'{label:>10}  upstream calls {upstream_hits:>6}  {total / elapsed:>7.0f} req/s  '
+        f'p50 {statistics.median(latencies) * 1000:>6.1f} ms'
+    )
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockForecastHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    helpers.WEATHER_URL = f'http://127.0.0.1:{server.server_port}/v1/forecast'
+
+    run('single', 0, total, workers)
+    for window in (0.02, 0.05):
+        run(f'batch {int(window * 1000)}ms', window, total, workers)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Нагрузочный тест вебхука: синтетические апдейты POST-запросами.
+
+Приложение make_webhook_app ставит апдейты в ChatDispatcher,
+обработчик имитирует работу бота. Измеряются устойчивая скорость
+приема апдейтов и задержка подтверждения (ack).
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_webhook [апдейтов] [клиентов]
+"""
+import http.client
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dispatcher import ChatDispatcher  # noqa: E402
+from utils.webhook import make_webhook_app, make_webhook_server  # noqa: E402
+
+SECRET = 'bench-secret'
+HANDLER_DELAY = 0.005
+
+
+def synthetic_update(update_id):
+    return json.dumps({
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': 0,
+            'chat': {'id': update_id % 500, 'type': 'private'},
+            'text': '/random number 1 100',
+        },
+    }).encode()
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+    dispatcher = ChatDispatcher(workers=16, queue_size=10000).start()
+
+    def on_update(payload):
+        dispatcher.submit(payload['message']['chat']['id'], time.sleep, HANDLER_DELAY)
+
+    app = make_webhook_app(on_update, '/webhook', SECRET)
+    server = make_webhook_server(app, '127.0.0.1', 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_port
+
+    def post(update_id):
+        body = synthetic_update(update_id)
+        start = time.perf_counter()
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        conn.request('POST', '/webhook', body, {
+            'Content-Type': 'application/json',
+            'X-Telegram-Bot-Api-Secret-Token': SECRET,
+        })
+        status = conn.getresponse().status
+        conn.close()
+        assert status == 200, status
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        acks = sorted(pool.map(post, range(total)))
+    accepted = time.perf_counter() - start
+    dispatcher.join()
+    processed = time.perf_counter() - start
+
+    print(f'accepted   {total / accepted:>8.0f} updates/s')
+    print(f'processed  {total / processed:>8.0f} updates/s')
+    print(
+        f'ack        p50 {statistics.median(acks) * 1000:.2f} ms  '
+        f'p99 {acks[int(len(acks) * 0.99) - 1] * 1000:.2f} ms'
+    )
+    print(f'dispatcher {dispatcher.stats()}')
+    dispatcher.stop()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Пачка из 10k /todo add: отдельные коммиты против групповой записи.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_write_behind [задач] [потоков]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+def burst(label, total, workers, synchronous=None, **options):
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'bench.db'), **options)
+
+        def add(i):
+            if synchronous is not None:
+                with db.get_connection() as conn:
+                    conn.execute(f'PRAGMA synchronous={synchronous}')
+            return db.add_task(i % 1000, f'задача {i}')
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            ids = list(pool.map(add, range(total)))
+        elapsed = time.perf_counter() - start
+        assert len(set(ids)) == total
+        extra = ''
+        if db.write_buffer is not None:
+            extra = f'  commits {db.write_buffer.flushes}'
+        db.close()
+    print(f'{label:>24} {total / elapsed:>9.0f} adds/s{extra}')
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    burst('commit per add (NORMAL)', total, workers)
+    burst('commit per add (FULL)', total, workers, synchronous='FULL')
+    burst('write-behind 5ms (FULL)', total, workers, write_behind=True)
+    burst('write-behind 0ms (FULL)', total, workers, write_behind=True, flush_interval=0)
+
+
+if __name__ == '__main__':
+    main()
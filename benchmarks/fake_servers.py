@@ -0,0 +1,285 @@
+"""Локальные подставные серверы для нагрузочного теста бота.
+
+bot-api - имитация Bot API (getUpdates/sendMessage/...) со встроенным
+генератором нагрузки: по команде /control/start создает апдейты из
+смеси команд от множества синтетических чатов с заданной скоростью и
+меряет задержку от появления апдейта до ответа бота в этот чат.
+
+upstream - мок курсов валют, геокодинга и погоды с настраиваемой
+задержкой; бот направляется на него через UPSTREAM_BASE_URL.
+
+Запускаются отдельными процессами (их CPU не смешивается с ботом):
+    python -m benchmarks.fake_servers bot-api ПОРТ
+    python -m benchmarks.fake_servers upstream ПОРТ [задержка_курсов] [задержка_погоды]
+"""
+import hashlib
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Смесь команд: текст и вес
+LOAD_MIX = (
+    ('/todo', 8), ('/todo list', 8), ('/todo add купить молоко и хлеб', 12),
+    ('/todo delete 1', 4), ('/currency 100 USD RUB', 8), ('/currency 50 EUR USD', 5),
+    ('/currency 10 GBP JPY', 3), ('/weather Москва', 6), ('/weather Тула', 4),
+    ('/weather Ярославль', 3), ('/weather Иркутск', 2), ('Мои задачи', 8), ('Погода', 4),
+    ('Конвертер', 3), ('/random number 1 100', 6), ('/random choice пицца суши паста', 4),
+    ('/help', 3), ('/start', 2), ('привет', 3),
+)
+
+RATES = {'USD': 1.0, 'EUR': 0.92, 'RUB': 91.5, 'GBP': 0.79, 'JPY': 149.8, 'CNY': 7.19}
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def params(self):
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            body = self.rfile.read(length)
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                params.update(json.loads(body))
+            else:
+                params.update(parse_qsl(body.decode()))
+        return parts.path, params
+
+    def reply(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeBotAPI:
+    """Состояние имитации Bot API и генератор нагрузки"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._updates = deque()
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._pending = {}
+        self.latencies = {}
+        self.generated = 0
+        self.replies = 0
+        self.unexpected = 0
+        self.started_at = None
+        self.finished_at = None
+        self.last_reply_at = None
+        self.generating = False
+
+    def get_updates(self, offset, limit, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._updates and self._updates[0]['update_id'] < offset:
+                self._updates.popleft()
+            while not self._updates:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
+            return [update for _, update in zip(range(limit), self._updates)]
+
+    def message_sent(self, chat_id, text):
+        now = time.monotonic()
+        with self._cond:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+            pending = self._pending.get(chat_id)
+            if pending:
+                created_at, command = pending.popleft()
+                self.latencies.setdefault(command, []).append(now - created_at)
+                self.replies += 1
+                self.last_reply_at = now
+            else:
+                self.unexpected += 1
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text,
+        }
+
+    def start_load(self, rate, duration, chats, seed=1):
+        with self._cond:
+            self.generating = True
+            self.started_at = time.monotonic()
+        threading.Thread(
+            target=self._generate, args=(rate, duration, chats, seed), daemon=True
+        ).start()
+
+    def stats(self):
+        with self._cond:
+            all_latencies = [value for values in self.latencies.values() for value in values]
+            return {
+                'generating': self.generating,
+                'generated': self.generated,
+                'replies': self.replies,
+                'unexpected': self.unexpected,
+                'pending': sum(len(pending) for pending in self._pending.values()),
+                'elapsed': (self.last_reply_at or self.started_at or 0) - (self.started_at or 0),
+                'latency': summarize(all_latencies),
+                'by_command': {command: summarize(values) for command, values in self.latencies.items()},
+            }
+
+    def _generate(self, rate, duration, chats, seed):
+        rng = random.Random(seed)
+        texts = [text for text, weight in LOAD_MIX for _ in range(weight)]
+        total = int(rate * duration)
+        start = time.monotonic()
+        for i in range(total):
+            delay = start + i / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            chat_id = 100000 + rng.randrange(chats)
+            text = rng.choice(texts)
+            with self._cond:
+                update_id = self._next_update_id
+                self._next_update_id += 1
+                self._updates.append({
+                    'update_id': update_id,
+                    'message': {
+                        'message_id': update_id,
+                        'date': int(time.time()),
+                        'chat': {'id': chat_id, 'type': 'private'},
+                        'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Load'},
+                        'text': text,
+                    },
+                })
+                command = ' '.join(text.split()[:2]) if text.startswith('/') else text
+                self._pending.setdefault(chat_id, deque()).append((time.monotonic(), command))
+                self.generated += 1
+                self._cond.notify_all()
+        with self._cond:
+            self.generating = False
+            self.finished_at = time.monotonic()
+
+
+def summarize(values):
+    if not values:
+        return {'count': 0}
+    values = sorted(values)
+
+    def percentile(share):
+        return values[min(len(values) - 1, int(len(values) * share))] * 1000
+
+    return {
+        'count': len(values),
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'mean_ms': statistics.fmean(values) * 1000,
+    }
+
+
+def make_bot_api_handler(api):
+    class Handler(QuietHandler):
+        def do_GET(self):
+            self.route()
+
+        def do_POST(self):
+            self.route()
+
+        def route(self):
+            path, params = self.params()
+            if path == '/control/start':
+                api.start_load(
+                    float(params.get('rate', 100)), float(params.get('duration', 10)),
+                    int(params.get('chats', 1000)), int(params.get('seed', 1)),
+                )
+                return self.reply({'ok': True})
+            if path == '/control/stats':
+                return self.reply(api.stats())
+
+            method = path.rsplit('/', 1)[-1]
+            if method == 'getUpdates':
+                result = api.get_updates(
+                    int(params.get('offset', 0)), int(params.get('limit', 100)),
+                    float(params.get('timeout', 0)),
+                )
+            elif method in ('sendMessage', 'editMessageText'):
+                result = api.message_sent(int(params['chat_id']), params.get('text', ''))
+            elif method == 'getMe':
+                result = {'id': 1, 'is_bot': True, 'first_name': 'LoadBot', 'username': 'load_bot'}
+            elif method in ('answerCallbackQuery', 'deleteWebhook', 'setWebhook'):
+                result = True
+            else:
+                return self.reply({'ok': False, 'error_code': 404, 'description': 'Not Found'}, 404)
+            self.reply({'ok': True, 'result': result})
+
+    return Handler
+
+
+def make_upstream_handler(rates_latency, weather_latency):
+    class Handler(QuietHandler):
+        def do_GET(self):
+            path, params = self.params()
+            if path.endswith('/search'):
+                time.sleep(weather_latency)
+                digest = hashlib.md5(params.get('name', '').encode()).digest()
+                return self.reply({'results': [{
+                    'name': params.get('name', ''),
+                    'latitude': round(40 + digest[0] / 12, 4),
+                    'longitude': round(20 + digest[1] / 3, 4),
+                }]})
+            if path.endswith('/forecast'):
+                time.sleep(weather_latency)
+                points = [
+                    {'current_weather': {'temperature': 12.5, 'weathercode': 2, 'windspeed': 4.1}}
+                    for _ in str(params.get('latitude', '0')).split(',')
+                ]
+                return self.reply(points[0] if len(points) == 1 else points)
+            # CurrencyAPI: /.../latest/currencies/usd/rub.json - проверяется раньше /latest/
+            if '/currencies/' in path:
+                time.sleep(rates_latency)
+                base, target = path[:-len('.json')].rsplit('/', 2)[-2:]
+                rate = RATES.get(target.upper(), 1.0) / RATES.get(base.upper(), 1.0)
+                return self.reply({target: rate})
+            if '/latest/' in path:
+                time.sleep(rates_latency)
+                base = path.rsplit('/', 1)[-1].upper()
+                if base not in RATES:
+                    return self.reply({'result': 'error'}, 404)
+                rates = {code: value / RATES[base] for code, value in RATES.items()}
+                return self.reply({'base': base, 'result': 'success', 'rates': rates})
+            self.reply({}, 404)
+
+    return Handler
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve(handler, port):
+    Server(('127.0.0.1', port), handler).serve_forever()
+
+
+def main():
+    kind, port = sys.argv[1], int(sys.argv[2])
+    if kind == 'bot-api':
+        serve(make_bot_api_handler(FakeBotAPI()), port)
+    elif kind == 'upstream':
+        rates_latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+        weather_latency = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+        serve(make_upstream_handler(rates_latency, weather_latency), port)
+    else:
+        raise SystemExit(f'unknown server: {kind}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,346 +1,405 @@
 import logging
-import telebot # type: ignore
-from telebot import types # type: ignore
 from config import Config
-from database import Database
+from database import open_database
 import random
-import os
-from dotenv import load_dotenv # type: ignore
-from utils.helpers import create_main_keyboard, get_exchange_rate, get_weather  
+import time
+from utils.helpers import (
+    build_tasks_page,
+    create_main_keyboard,
+    decode_task_cursor,
+    geo_cache,
+    get_exchange_rate,
+    rate_prefetcher,
+    get_weather,
+)
+from utils.dispatcher import ChatDispatcher
+from utils.metrics import (
+    DISPATCH_BUSY_WORKERS,
+    DISPATCH_QUEUE_DEPTH,
+    DISPATCH_SECONDS,
+    SEND_PAUSED_CHATS,
+    SEND_QUEUE_DEPTH,
+    instrument_handler,
+    start_metrics_server,
+)
+from utils.ratelimit import ANY_COMMAND, RateLimiter, limit_group, parse_limits
+from utils.router import ANY, REST, WORDS, ArgumentError, CommandRouter, upper
+from utils.reminders import ReminderScheduler, split_due
+from utils.sender import PRIORITY_BROADCAST, MessageSender
+from utils.messages import (
+    CONVERTER_HINT_TEXT,
+    CURRENCY_AMOUNT_INVALID_TEXT,
+    CURRENCY_FAILED_TEXT,
+    CURRENCY_USAGE_TEXT,
+    HELP_TEXT,
+    RANDOM_NUMBER_INVALID_TEXT,
+    RANDOM_OPTIONS_TEXT,
+    TASKS_EMPTY_TEXT,
+    TODO_ADD_USAGE_TEXT,
+    TODO_DELETE_USAGE_TEXT,
+    WEATHER_FAILED_TEXT,
+    WEATHER_HINT_TEXT,
+    WEATHER_USAGE_TEXT,
+    WELCOME_TEXT,
+    format_currency_result,
+    format_weather,
+    random_number_usage,
+    rate_limited_text,
+    reminder_text,
+    task_added_text,
+)
 
-load_dotenv()
+# .env читается один раз в config.py
+BOT_TOKEN = Config.BOT_TOKEN
 
-logging.basicConfig (
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Создаются в create_bot(): модуль импортируется без токена, сети, БД и telebot
+bot = None
+db = None
+sender = None
+dispatcher = None
+reminders = None
 
-# Инициализация бота и базы данных
-BOT_TOKEN = os.getenv('BOT_TOKEN') or Config.BOT_TOKEN
-if not BOT_TOKEN:
-    print("❌ ОШИБКА: BOT_TOKEN не найден!")
-    exit(1)
+router = CommandRouter()
+limiter = RateLimiter(parse_limits(Config.RATE_LIMITS)) if Config.RATE_LIMIT else None
 
-bot = telebot.TeleBot(BOT_TOKEN)
-db = Database()
+def create_bot(token=None, api_url=None, database=None):
+    """Собрать бота: TeleBot, база данных, очередь отправки и обработчики.
 
-@bot.message_handler(commands=['start'])
-def send_welcome(message):
-    welcome_text = """
-🤖 Добро пожаловать в SmartHelperBot!
+    token, api_url (свой сервер Bot API) и database подставляются,
+    например, для запуска против локального тестового сервера.
+    telebot импортируется здесь, а схема БД проверяется при первом
+    запросе к ней - импорт и сборка бота не трогают диск и сеть.
+    """
+    global bot, db, sender, dispatcher, reminders
+    import telebot # type: ignore
+    from utils.telegram import DispatchingTeleBot
+    token = token or BOT_TOKEN
+    api_url = api_url or Config.TELEGRAM_API_URL
+    if api_url:
+        telebot.apihelper.API_URL = api_url.rstrip('/') + '/bot{0}/{1}'
+
+    if Config.DISPATCH_MODE == 'pool':
+        dispatcher = ChatDispatcher(
+            Config.DISPATCH_WORKERS, Config.DISPATCH_QUEUE_SIZE, latency=DISPATCH_SECONDS.labels('updates')
+        )
+        DISPATCH_QUEUE_DEPTH.collector = lambda: {('updates',): dispatcher.queue_depth()}
+        DISPATCH_BUSY_WORKERS.collector = lambda: {('updates',): dispatcher.busy}
+        bot = DispatchingTeleBot(token, dispatcher)
+    else:
+        dispatcher = None
+        bot = telebot.TeleBot(token)
+    db = database or open_database(
+        Config.DATABASE_URL,
+        pool_size=Config.DB_POOL_SIZE,
+        lazy=True,
+        write_behind=Config.DB_WRITE_BEHIND,
+        flush_interval=Config.DB_FLUSH_INTERVAL,
+        flush_batch=Config.DB_FLUSH_BATCH,
+        task_cache=Config.TASK_CACHE,
+        task_cache_users=Config.TASK_CACHE_USERS,
+        task_cache_bytes=Config.TASK_CACHE_BYTES,
+    )
+    geo_cache.store = db
+    sender = MessageSender(
+        bot.send_message,
+        global_rate=Config.SEND_GLOBAL_RATE,
+        chat_rate=Config.SEND_CHAT_RATE,
+        chat_burst=Config.SEND_CHAT_BURST,
+        workers=Config.SEND_WORKERS,
+    )
+    SEND_QUEUE_DEPTH.collector = lambda: {(): sender.queue_depth()}
+    SEND_PAUSED_CHATS.collector = lambda: {(): sender.paused_chats()}
+    if Config.REMINDERS:
+        reminders = ReminderScheduler(
+            db, deliver_reminders, tick=Config.REMINDER_TICK, horizon=Config.REMINDER_HORIZON
+        )
+    bot.register_message_handler(handle_message, content_types=['text'])
+    bot.register_callback_query_handler(handle_tasks_page, func=is_tasks_page)
+    return bot
 
-Я ваш универсальный помощник в Telegram. Вот что я умею:
+def configure_logging():
+    logging.basicConfig (
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
 
-📝 *Управление задачами* - создавайте и управляйте списком дел
-💱 *Конвертер валют* - актуальные курсы валют
-🌤️ *Погода* - текущая погода в любом городе
-🎲 *Случайность* - генератор чисел и помощник в выборе
+def start_workers():
+    """Запустить пул обработки апдейтов и очередь отправки"""
+    if dispatcher is not None:
+        dispatcher.start()
+    if Config.SEND_QUEUE:
+        sender.start()
+    if Config.RATE_PREFETCH:
+        rate_prefetcher.start()
+    if reminders is not None:
+        reminders.start()
 
-Используйте кнопки меню или команды для навигации!
-    """
-    
-    bot.send_message(
+def deliver_reminders(tasks):
+    """Пачка сработавших напоминаний - в очередь отправки с приоритетом рассылки"""
+    for task in tasks:
+        sender.send(task['user_id'], reminder_text(task), priority=PRIORITY_BROADCAST, parse_mode='Markdown')
+
+def rate_limited(message, group=ANY_COMMAND):
+    """Проверка лимита пользователя; True - сообщение отбрасывается"""
+    user_id = message.from_user.id if message.from_user else message.chat.id
+    retry_after = limiter.check(user_id, group)
+    if not retry_after:
+        return False
+    if limiter.first_rejection(user_id, retry_after):
+        sender.send(message.chat.id, rate_limited_text(retry_after))
+    return True
+
+def handle_message(message):
+    """Единая точка входа текстовых сообщений: лимиты, затем разбор по таблице команд"""
+    if limiter is not None and rate_limited(message):
+        return
+    try:
+        handler, args = router.resolve(message.text)
+    except ArgumentError as e:
+        sender.send(message.chat.id, e.text, parse_mode='Markdown')
+        return
+    group = getattr(handler, 'rate_limit_group', None)
+    if group is not None and limiter is not None and rate_limited(message, group):
+        return
+    handler(message, *args)
+
+@router.command('start')
+@instrument_handler
+def send_welcome(message):
+    sender.send(
         message.chat.id,
-        welcome_text,
+        WELCOME_TEXT,
         reply_markup=create_main_keyboard(),
         parse_mode='Markdown'
     )
 
-@bot.message_handler(commands=['help'])
+@router.command('help')
+@instrument_handler
 def send_help(message):
-    help_text = """
-    📋 *Доступные команды:*
-
-    *Управление задачами:*
-    /todo add [задача] - добавить таск
-    /todo list - показать таски  
-    /todo delete [номер] - удалить таск
-
-    *Конвертер валют:*
-    /currency [сумма] [из] [в]
-    Пример: `/currency 100 USD RUB`
-
-    *Погода:*
-    /weather [город]
-    Пример: `/weather Москва`
-
-    *Случайность:*
-    /random number [от] [до]
-    Пример: `/random number 1 100` 
-    /random choice [варианты] - Случайный выбор
-    Пример: `/random choice пицца сыр колбаска`
-        """
-    
-    bot.send_message(
+    sender.send(
         message.chat.id,
-        help_text,
+        HELP_TEXT,
         parse_mode='Markdown'
     )
 
-@bot.message_handler(commands=['todo'])
-def handle_todo(message):
+@router.command('todo')
+@router.command('todo', 'list')
+@router.button('Мои задачи')
+@instrument_handler
+def handle_todo_list(message):
+    show_tasks(message.chat.id)
+
+@router.command('todo', 'add', params=(REST,), usage=TODO_ADD_USAGE_TEXT)
+@limit_group('todo')
+@instrument_handler
+def handle_todo_add(message, task_text):
+    chat_id = message.chat.id
     try:
-        chat_id = message.chat.id
-        command_text = message.text
-        
-        if command_text.strip() == '/todo':
-            show_tasks(chat_id)
-            return
-            
-        command_parts = command_text.split(maxsplit=2)
-        
-        if len(command_parts) < 2:
-            show_tasks(chat_id)
-            return
-            
-        action = command_parts[1].lower()
-        
-        if action == 'add':
-            if len(command_parts) > 2:
-                task_text = command_parts[2]
-                if task_text.strip():
-                    db.add_task(chat_id, task_text)
-                    bot.send_message(chat_id, f"✅ Задача добавлена: *{task_text}*", parse_mode='Markdown')
-                else:
-                    bot.send_message(chat_id, "❌ Текст задачи не может быть пустым")
-            else:
-                bot.send_message(chat_id, "❌ Укажите задачу: `/todo add Ваша задача`", parse_mode='Markdown')
-                
-        elif action == 'list':
-            show_tasks(chat_id)
-            
-        elif action == 'delete':
-            if len(command_parts) > 2:
-                try:
-                    task_id = int(command_parts[2])
-                    if db.delete_task(chat_id, task_id):
-                        bot.send_message(chat_id, "✅ Задача удалена")
-                    else:
-                        bot.send_message(chat_id, "❌ Задача не найдена")
-                except ValueError:
-                    bot.send_message(chat_id, "❌ Неверный номер задачи")
-            else:
-                bot.send_message(chat_id, "❌ Укажите номер задачи: `/todo delete 1`", parse_mode='Markdown')
+        task_text, due_at = split_due(task_text, time.time(), Config.UTC_OFFSET)
+        task_id = db.add_task(chat_id, task_text, due_at)
+        if due_at is not None and reminders is not None:
+            reminders.schedule(task_id, chat_id, due_at)
+        sender.send(chat_id, task_added_text(task_text, due_at, Config.UTC_OFFSET), parse_mode='Markdown')
+    except Exception as e:
+        logging.error(f"Todo error: {e}")
+        sender.send(chat_id, "❌ Произошла ошибка при обработке запроса")
+
+@router.command(
+    'todo', 'delete', params=(int,), usage=TODO_DELETE_USAGE_TEXT, invalid="❌ Неверный номер задачи"
+)
+@limit_group('todo')
+@instrument_handler
+def handle_todo_delete(message, task_id):
+    chat_id = message.chat.id
+    try:
+        if db.delete_task(chat_id, task_id):
+            sender.send(chat_id, "✅ Задача удалена")
         else:
-            bot.send_message(chat_id, "❌ Неизвестная команда. Используйте: add, list или delete")
-            
+            sender.send(chat_id, "❌ Задача не найдена")
     except Exception as e:
         logging.error(f"Todo error: {e}")
-        bot.send_message(message.chat.id, "❌ Произошла ошибка при обработке запроса")
+        sender.send(chat_id, "❌ Произошла ошибка при обработке запроса")
+
+@router.command('todo', ANY)
+@instrument_handler
+def handle_todo_unknown(message, *args):
+    sender.send(message.chat.id, "❌ Неизвестная команда. Используйте: add, list или delete")
 
-@bot.message_handler(commands=['currency'])
-def handle_currency(message):
+@router.command(
+    'currency', params=(float, upper, upper), usage=CURRENCY_USAGE_TEXT, invalid=CURRENCY_AMOUNT_INVALID_TEXT
+)
+@limit_group('currency')
+@instrument_handler
+def handle_currency(message, amount, from_currency, to_currency):
+    chat_id = message.chat.id
     try:
-        chat_id = message.chat.id
-        parts = message.text.split()
-
-        if len(parts) != 4:
-            bot.send_message(
-                chat_id,
-                "💱 *Конвертер валют*\n\n"
-                "❌ *Неверный формат команды*\n\n"
-                "Используйте:\n`/currency [сумма] [из] [в]`\n\n"
-                "*Пример:*\n`/currency 100 USD RUB`\n"
-                "*Поддерживаемые валюты:* USD, EUR, RUB, GBP, JPY, CNY, etc.",
-                parse_mode='Markdown'
-            )
-            return
-            
-        amount = float(parts[1])
-        from_currency = parts[2].upper()
-        to_currency = parts[3].upper()
-        
-        # Логируем запрос
-        logging.info(f"=== ЗАПРОС КОНВЕРТАЦИИ ===")
-        logging.info(f"Пользователь: {chat_id}")
-        logging.info(f"Команда: {amount} {from_currency} -> {to_currency}")
+        # Подробности запроса - только на уровне DEBUG, аргументы форматируются лениво
+        logging.debug('Запрос конвертации от %s: %s %s -> %s', chat_id, amount, from_currency, to_currency)
         
         converted_amount, rate = get_exchange_rate(from_currency, to_currency, amount)
-        
-        # ДЕТАЛЬНАЯ ОТЛАДКА
-        logging.info(f"Результат функции: converted_amount={converted_amount}, rate={rate}")
-        logging.info(f"Типы: converted_amount type={type(converted_amount)}, rate type={type(rate)}")
+        logging.debug('Результат конвертации: converted_amount=%s, rate=%s', converted_amount, rate)
         
         if converted_amount is not None and rate is not None:
-            result_text = (
-                f"💱 *Результат конвертации:*\n\n"
-                f"*{amount} {from_currency}* = *{converted_amount:.2f} {to_currency}*\n"
-                f"Курс: 1 {from_currency} = {rate:.4f} {to_currency}"
-            )
-            logging.info(f"✅ Отправляем результат пользователю: {result_text}")
-            bot.send_message(chat_id, result_text, parse_mode='Markdown')
+            result_text = format_currency_result(amount, from_currency, to_currency, converted_amount, rate)
+            sender.send(chat_id, result_text, parse_mode='Markdown')
         else:
-            result_text = (
-                f"❌ Не удалось получить курс валют.\n\n"
-                f"*Возможные причины:*\n"
-                f"• Неправильные коды валют\n"  
-                f"• Временные проблемы с API\n"
-                f"• Попробуйте другие валюты\n\n"
-                f"*Пример:* `/currency 1 USD EUR`"
-            )
-            logging.error(f"❌ Конвертация не удалась - возвращены None")
-            bot.send_message(chat_id, result_text, parse_mode='Markdown')
+            result_text = CURRENCY_FAILED_TEXT
+            logging.warning('❌ Конвертация %s -> %s не удалась', from_currency, to_currency)
+            sender.send(chat_id, result_text, parse_mode='Markdown')
                 
-    except ValueError as e:
-        logging.error(f"ValueError: {e}")
-        bot.send_message(chat_id, "❌ Неверный формат суммы. Используйте числа, например: 100 или 50.5")
     except Exception as e:
         logging.error(f"Currency error: {e}")
-        bot.send_message(chat_id, f'❌ Произошла ошибка при конвертации: {str(e)}')
+        sender.send(chat_id, f'❌ Произошла ошибка при конвертации: {str(e)}')
 
-@bot.message_handler(commands=['weather'])
-def handle_weather(message):
+@router.command('weather', params=(REST,), usage=WEATHER_USAGE_TEXT)
+@limit_group('weather')
+@instrument_handler
+def handle_weather(message, city):
+    chat_id = message.chat.id
     try:    
-        chat_id = message.chat.id
-        parts = message.text.split(maxsplit=1)
-        
-        if len(parts) < 2:
-            bot.send_message(
-                chat_id,
-                "🌤️ *Погода*\n\n"
-                "❌ *Укажите город*\n\n"
-                "Пример:\n`/weather Москва`",
-                parse_mode='Markdown'
-            )
-            return
-            
-        city = parts[1]
         weather_data = get_weather(city) 
         
         if weather_data == "city_not_found":
-            bot.send_message(chat_id, f"❌ Город '{city}' не найден")
+            sender.send(chat_id, f"❌ Город '{city}' не найден")
             return
         elif weather_data:
-            weather_emojis = {
-                'clear': "☀️",
-                'cloud': "☁️",
-                'rain': "🌧️",
-                'snow': "❄️", 
-                'thunderstorm': "⛈️",
-                'drizzle': "🌦️",
-                'mist': "🌫️",
-            }
-
-            description = weather_data['description']
-            emoji = '🌤️'
-            for key, value in weather_emojis.items():
-                if key in description.lower():
-                    emoji = value
-                    break
-
-            weather_text = (
-                f"{emoji} *Погода в {weather_data['city']}*\n\n"
-                f"*Описание:* {description.capitalize()}\n"
-                f"*Температура:* {weather_data['temperature']:.1f}°C\n"
-                f"*Ощущается как:* {weather_data['feels_like']:.1f}°C\n"
-                f"*Влажность:* {weather_data['humidity']}%"
-            )
+            weather_text = format_weather(weather_data)
         else:
-            weather_text = "❌ Не удалось получить данные о погоде. Проверьте название города."
+            weather_text = WEATHER_FAILED_TEXT
 
-        bot.send_message(chat_id, weather_text, parse_mode='Markdown')
+        sender.send(chat_id, weather_text, parse_mode='Markdown')
 
     except Exception as e:
         logging.error(f'Weather error: {e}')
-        bot.send_message(chat_id, '❌ Произошла ошибка при получении погоды')
+        sender.send(chat_id, '❌ Произошла ошибка при получении погоды')
 
-@bot.message_handler(commands=['random'])
-def random_handler(message):
-    try:    
-        chat_id = message.chat.id
-        command_text = message.text
-        logging.info(f"Random command received: {command_text}")
-        if command_text.strip() == '/random':
-            show_random_options(chat_id)
-            return
-        remaining_text = command_text.replace('/random', '').strip()
-        parts = remaining_text.split()
-        
-        logging.info(f"Parts after split: {parts}")
-        
-        if len(parts) < 1:
-            show_random_options(chat_id)
-            return
-        
-        action = parts[0].lower()
-        
-        if action == 'number':
-            if len(parts) == 3:
-                try:
-                    min_val = int(parts[1])
-                    max_val = int(parts[2])
-                    if min_val >= max_val:
-                        bot.send_message(chat_id, "❌ Первое число должно быть меньше второго")
-                    else:
-                        result = random.randint(min_val, max_val)
-                        bot.send_message(chat_id, f"🎲 Случайное число: *{result}*", parse_mode='Markdown')
-                except ValueError:
-                    bot.send_message(chat_id, "❌ Неверный формат чисел. Используйте: `/random number 1 100`", parse_mode='Markdown')
-            else:
-                bot.send_message(chat_id, f"❌ Укажите диапазон: `/random number 1 100`\n\nПолучено: {' '.join(parts)}", parse_mode='Markdown')
-        elif action == 'choice':
-            if len(parts) >= 2:
-                choices = parts[1:]
-                if len(choices) >= 2:
-                    result = random.choice(choices)
-                    bot.send_message(chat_id, f"🎯 Я выбираю: *{result}*", parse_mode='Markdown')
-                else:
-                    bot.send_message(chat_id, "❌ Укажите хотя бы 2 варианта для выбора")
-            else:
-                bot.send_message(chat_id, "❌ Укажите варианты: `/random choice пицца суши`", parse_mode='Markdown')
-        else:
-            show_random_options(chat_id)
-    except Exception as e:
-        logging.error(f'Random error: {e}')
-        bot.send_message(chat_id, '❌ Произошла ошибка')
-@bot.message_handler(content_types=['text'])
-def handle_text_messages(message):
+@router.command(
+    'random', 'number', params=(int, int), usage=random_number_usage, invalid=RANDOM_NUMBER_INVALID_TEXT
+)
+@instrument_handler
+def handle_random_number(message, min_val, max_val):
     chat_id = message.chat.id
-    text = message.text.strip()
-    if text == 'Мои задачи':
-        show_tasks(chat_id) 
-    elif text == 'Конвертер':
-        bot.send_message(chat_id, '💱 *Конвертер валют* \n\nИспользуйте формат:\n`/currency 100 USD RUB`', parse_mode='Markdown')
-    elif text == 'Погода':
-        bot.send_message(chat_id, '🌤️ *Погода*\n\nВведите команду:\n`/weather Москва`', parse_mode='Markdown')
-    elif text == 'Случайность':
-        show_random_options(chat_id) 
+    if min_val >= max_val:
+        sender.send(chat_id, "❌ Первое число должно быть меньше второго")
     else:
-        bot.send_message(chat_id, "Не понимаю команду. Используйте кнопки меню или /help")
+        result = random.randint(min_val, max_val)
+        sender.send(chat_id, f"🎲 Случайное число: *{result}*", parse_mode='Markdown')
+
+@router.command('random', 'choice', params=(WORDS,))
+@instrument_handler
+def handle_random_choice(message, choices):
+    chat_id = message.chat.id
+    if not choices:
+        sender.send(chat_id, "❌ Укажите варианты: `/random choice пицца суши`", parse_mode='Markdown')
+    elif len(choices) < 2:
+        sender.send(chat_id, "❌ Укажите хотя бы 2 варианта для выбора")
+    else:
+        result = random.choice(choices)
+        sender.send(chat_id, f"🎯 Я выбираю: *{result}*", parse_mode='Markdown')
+
+@router.command('random')
+@router.command('random', ANY)
+@router.button('Случайность')
+@instrument_handler
+def show_random_options(message, *args):
+    sender.send(message.chat.id, RANDOM_OPTIONS_TEXT, parse_mode='Markdown')
+
+@router.button('Конвертер')
+@instrument_handler
+def handle_converter_button(message):
+    sender.send(message.chat.id, CONVERTER_HINT_TEXT, parse_mode='Markdown')
+
+@router.button('Погода')
+@instrument_handler
+def handle_weather_button(message):
+    sender.send(message.chat.id, WEATHER_HINT_TEXT, parse_mode='Markdown')
+
+@router.fallback
+@instrument_handler
+def handle_unknown(message):
+    sender.send(message.chat.id, "Не понимаю команду. Используйте кнопки меню или /help")
 
 def show_tasks(chat_id):
     """Показать задачи пользователю"""
     try:
-        tasks = db.get_user_tasks(chat_id)
-        if not tasks:
-            bot.send_message(chat_id, '📝 *Список задач пуст*\n\nДобавьте задачу: `/todo add Ваша задача`', parse_mode='Markdown')
+        tasks_text, keyboard = build_tasks_page(db, chat_id)
+        if tasks_text is None:
+            sender.send(chat_id, TASKS_EMPTY_TEXT, parse_mode='Markdown')
             return 
-        tasks_text = '📝 *Ваши задачи:*\n\n'
-        for task in tasks:
-            tasks_text += f"{task['id']}. {task['task_text']}\n"
-        tasks_text += "\nУдалить задачу: `/todo delete номер`"
-        bot.send_message(chat_id, tasks_text, parse_mode='Markdown')
+        sender.send(chat_id, tasks_text, reply_markup=keyboard, parse_mode='Markdown')
     except Exception as e:
         logging.error(f"Show tasks error: {e}")
-        bot.send_message(chat_id, "❌ Ошибка при загрузке задач")
-def show_random_options(chat_id):
-    options_text = (
-        "🎲 *Модуль случайностей*\n\n"
-        "*Случайное число:*\n`/random number 1 100`\n\n"
-        "*Случайный выбор:*\n`/random choice пицца суши паста`\n\n"
-        "*Примеры:*\n"
-        "• `/random number 1 50` - число от 1 до 50\n"
-        "• `/random choice кофе чай сок` - выбор напитка\n"
-        "• `/random choice да нет` - простой выбор"
-    )
-    bot.send_message(chat_id, options_text, parse_mode='Markdown')
+        sender.send(chat_id, "❌ Ошибка при загрузке задач")
+
+def is_tasks_page(call):
+    return bool(call.data) and call.data.startswith('tasks:')
+
+@instrument_handler
+def handle_tasks_page(call):
+    """Листание списка задач кнопками"""
+    try:
+        _, direction, value = call.data.split(':', 2)
+        chat_id = call.message.chat.id
+        tasks_text, keyboard = build_tasks_page(
+            db, chat_id, decode_task_cursor(value), backward=direction == 'prev'
+        )
+        if tasks_text is None:
+            bot.answer_callback_query(call.id, "Задач больше нет")
+            return
+        bot.edit_message_text(
+            tasks_text,
+            chat_id,
+            call.message.message_id,
+            reply_markup=keyboard,
+            parse_mode='Markdown'
+        )
+        bot.answer_callback_query(call.id)
+    except Exception as e:
+        logging.error(f"Tasks page error: {e}")
+        bot.answer_callback_query(call.id, "❌ Ошибка при загрузке задач")
+
+def create_webhook_app():
+    """WSGI-приложение вебхука (для запуска в нескольких процессах: gunicorn "bot:create_webhook_app()")"""
+    from telebot import types # type: ignore
+    from utils.webhook import make_webhook_app
+    configure_logging()
+    if bot is None:
+        create_bot()
+    start_workers()
+
+    def on_update(payload):
+        bot.process_new_updates([types.Update.de_json(payload)])
+
+    return make_webhook_app(on_update, Config.WEBHOOK_PATH, Config.WEBHOOK_SECRET or None)
 
 if __name__ == '__main__':
+    configure_logging()
+    if not BOT_TOKEN:
+        print("❌ ОШИБКА: BOT_TOKEN не найден!")
+        exit(1)
+    create_bot()
+
     print("🚀 Запуск бота...")
     print(f"✅ Токен: {'Найден' if BOT_TOKEN else '❌ НЕ НАЙДЕН'}")
     print("🌐 API: Frankfurter, Open-Meteo")
-    print("💾 База данных: SQLite")
+    print(f"💾 База данных: {db.describe()}")
     print("📱 Бот готов к работе...")
     
     logging.info("Бот запущен")
-    bot.infinity_polling()
\ No newline at end of file
+    if Config.METRICS_PORT:
+        if start_metrics_server(Config.METRICS_HOST, Config.METRICS_PORT) is not None:
+            logging.info(f"Метрики: http://{Config.METRICS_HOST}:{Config.METRICS_PORT}/metrics")
+    if dispatcher is not None:
+        logging.info(f"Режим обработки: пул из {dispatcher.workers} воркеров")
+
+    if Config.RUN_MODE == 'webhook':
+        from utils.webhook import serve_webhook
+        bot.remove_webhook()
+        bot.set_webhook(
+            url=Config.WEBHOOK_URL + Config.WEBHOOK_PATH,
+            secret_token=Config.WEBHOOK_SECRET or None
+        )
+        serve_webhook(create_webhook_app(), Config.WEBHOOK_HOST, Config.WEBHOOK_PORT)
+    else:
+        start_workers()
+        bot.infinity_polling()
\ No newline at end of file
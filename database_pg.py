@@ -0,0 +1,282 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+from database import UserTaskCache, cached_page
+from utils.metrics import DB_SECONDS, timed
+
+# Миграции схемы PostgreSQL: (версия, список SQL-выражений).
+# Версия хранится в таблице schema_version, новые миграции только дописываются в конец.
+MIGRATIONS = [
+    (1, [
+        '''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id BIGSERIAL PRIMARY KEY,
+            user_id BIGINT NOT NULL,
+            task_text TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        )
+        ''',
+    ]),
+    (2, [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_tasks_user_created
+        ON tasks (user_id, created_at, id) INCLUDE (task_text)
+        ''',
+    ]),
+    (3, [
+        '''
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            key TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            latitude DOUBLE PRECISION NOT NULL,
+            longitude DOUBLE PRECISION NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        )
+        ''',
+    ]),
+    (4, [
+        'ALTER TABLE tasks ADD COLUMN IF NOT EXISTS due_at BIGINT',
+        'ALTER TABLE tasks ADD COLUMN IF NOT EXISTS reminded BOOLEAN NOT NULL DEFAULT false',
+        'DROP INDEX IF EXISTS idx_tasks_user_created',
+        '''
+        CREATE INDEX idx_tasks_user_created
+        ON tasks (user_id, created_at, id) INCLUDE (task_text, due_at)
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_tasks_due
+        ON tasks (due_at, id) WHERE due_at IS NOT NULL AND NOT reminded
+        ''',
+    ]),
+]
+
+# Ключ advisory-блокировки миграций: процессы бота не мигрируют одновременно
+MIGRATION_LOCK_ID = 7305001
+
+# created_at отдается строкой фиксированной ширины: курсоры страниц и ключи
+# кэша сравниваются так же, как у SQLite. Псевдоним совпадает с колонкой, поэтому
+# ORDER BY пишется через tasks.: иначе сортировка шла бы по тексту, мимо индекса
+CREATED_AT = "to_char(created_at, 'YYYY-MM-DD HH24:MI:SS.US') AS created_at"
+
+USER_TASKS_QUERY = (
+    'SELECT id, task_text, due_at FROM tasks WHERE user_id = %s ORDER BY created_at, id'
+)
+CACHED_TASKS_QUERY = (
+    f'SELECT id, task_text, {CREATED_AT}, due_at FROM tasks WHERE user_id = %s ORDER BY tasks.created_at, tasks.id'
+)
+INSERT_TASK_QUERY = (
+    'INSERT INTO tasks (user_id, task_text, due_at) VALUES (%s, %s, %s) '
+    f'RETURNING id, task_text, {CREATED_AT}, due_at'
+)
+DUE_REMINDERS_QUERY = (
+    'SELECT id, user_id, due_at FROM tasks '
+    'WHERE due_at IS NOT NULL AND NOT reminded AND due_at < %s AND (due_at, id) > (%s, %s) '
+    'ORDER BY due_at, id LIMIT %s'
+)
+CLAIM_REMINDERS_QUERY = (
+    'UPDATE tasks SET reminded = true WHERE id = ANY(%s) AND NOT reminded '
+    'RETURNING id, user_id, task_text, due_at'
+)
+DELETE_TASK_QUERY = 'DELETE FROM tasks WHERE id = %s AND user_id = %s'
+
+
+class PostgresDatabase:
+    """Хранилище на PostgreSQL с тем же интерфейсом, что у Database.
+
+    Соединения берутся из пула psycopg2 (не больше pool_size на процесс);
+    при пустом пуле поток ждет свободное соединение. Кэш списков задач
+    работает так же, как у SQLite-варианта.
+    """
+
+    def __init__(self, dsn, pool_size=10, task_cache=False, task_cache_users=10000,
+                 task_cache_bytes=64 * 1024 * 1024, lazy=False):
+        # psycopg2 - необязательная зависимость, нужна только этому хранилищу
+        import psycopg2.extras # type: ignore
+        import psycopg2.pool # type: ignore
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            1, pool_size, dsn, cursor_factory=psycopg2.extras.RealDictCursor
+        )
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._schema_lock = threading.Lock()
+        self._ready = False
+        self.task_cache = None
+        if task_cache:
+            self.task_cache = UserTaskCache(task_cache_users, task_cache_bytes)
+        if not lazy:
+            self._ensure_schema()
+
+    def _ensure_schema(self):
+        if self._ready:
+            return
+        with self._schema_lock:
+            if not self._ready:
+                self.init_database()
+                self._ready = True
+
+    def init_database(self):
+        """Применение недостающих миграций под advisory-блокировкой"""
+        with self._pooled() as conn:
+            with conn.cursor() as cur:
+                cur.execute('SELECT pg_advisory_xact_lock(%s)', (MIGRATION_LOCK_ID,))
+                cur.execute('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)')
+                cur.execute('SELECT max(version) AS version FROM schema_version')
+                version = cur.fetchone()['version'] or 0
+                for target, statements in MIGRATIONS:
+                    if target <= version:
+                        continue
+                    for statement in statements:
+                        cur.execute(statement)
+                    cur.execute('INSERT INTO schema_version (version) VALUES (%s)', (target,))
+                    logging.info(f'Миграция БД применена: версия {target}')
+                    version = target
+            conn.commit()
+
+    def schema_version(self):
+        """Текущая версия схемы"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('SELECT max(version) AS version FROM schema_version')
+                return cur.fetchone()['version'] or 0
+
+    @contextmanager
+    def _pooled(self):
+        self._slots.acquire()
+        try:
+            conn = self._pool.getconn()
+            try:
+                yield conn
+            except Exception as e:
+                logging.error(f'Ошибка базы данных: {e}')
+                conn.rollback()
+                raise
+            finally:
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def get_connection(self):
+        """Соединение из пула (возвращается в пул после блока)"""
+        self._ensure_schema()
+        with self._pooled() as conn:
+            yield conn
+
+    def _execute(self, query, params, fetch=None):
+        """Выполнить запрос в отдельной транзакции: fetch - 'one', 'all' или None (rowcount)"""
+        with self.get_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                if fetch == 'one':
+                    result = cur.fetchone()
+                elif fetch == 'all':
+                    result = cur.fetchall()
+                else:
+                    result = cur.rowcount
+            conn.commit()
+        return result
+
+    def close(self):
+        """Закрыть все соединения пула"""
+        self._pool.closeall()
+
+    def describe(self):
+        """Хранилище для стартового сообщения (без DSN: в нем пароль)"""
+        return f'PostgreSQL (пул до {self.pool_size} соединений)'
+
+    @timed(DB_SECONDS, 'add_task')
+    def add_task(self, user_id, task_text, due_at=None):
+        """Добавить задачу; due_at - срок напоминания (unix-время)"""
+        row = self._execute(INSERT_TASK_QUERY, (user_id, task_text, due_at), fetch='one')
+        if self.task_cache is not None:
+            self.task_cache.added(user_id, row)
+        return row['id']
+
+    def _cached_tasks(self, user_id):
+        """(ключи, задачи) пользователя из кэша, при промахе - загрузка из БД"""
+        cached = self.task_cache.get(user_id)
+        if cached is not None:
+            return cached
+        version = self.task_cache.begin_load(user_id)
+        try:
+            tasks = self._execute(CACHED_TASKS_QUERY, (user_id,), fetch='all')
+        except Exception:
+            self.task_cache.finish_load(user_id, version, None)
+            raise
+        return self.task_cache.finish_load(user_id, version, tasks)
+
+    @timed(DB_SECONDS, 'get_user_tasks')
+    def get_user_tasks(self, user_id):
+        """Получение задач пользователя"""
+        if self.task_cache is not None:
+            return list(self._cached_tasks(user_id)[1])
+        return self._execute(USER_TASKS_QUERY, (user_id,), fetch='all')
+
+    @timed(DB_SECONDS, 'get_user_tasks_page')
+    def get_user_tasks_page(self, user_id, cursor=None, backward=False, limit=20):
+        """Страница задач пользователя (keyset-пагинация по (created_at, id))"""
+        if self.task_cache is not None:
+            keys, tasks = self._cached_tasks(user_id)
+            return cached_page(keys, tasks, cursor, backward, limit)
+        query = f'SELECT id, task_text, {CREATED_AT}, due_at FROM tasks WHERE user_id = %s'
+        params = [user_id]
+        if cursor is not None:
+            query += (' AND (created_at, id) < (%s::timestamp, %s)' if backward
+                      else ' AND (created_at, id) > (%s::timestamp, %s)')
+            params.extend(cursor)
+        query += (' ORDER BY tasks.created_at DESC, tasks.id DESC' if backward
+                  else ' ORDER BY tasks.created_at, tasks.id')
+        query += ' LIMIT %s'
+        params.append(limit + 1)
+        rows = self._execute(query, params, fetch='all')
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+        return rows, has_more
+
+    @timed(DB_SECONDS, 'delete_task')
+    def delete_task(self, user_id, task_id):
+        """Удаление задачи"""
+        rowcount = self._execute(DELETE_TASK_QUERY, (task_id, user_id))
+        if rowcount > 0 and self.task_cache is not None:
+            self.task_cache.deleted(user_id, task_id)
+        return rowcount > 0
+
+    def iter_reminders(self, since, until, batch=1000):
+        """Неотправленные напоминания со сроком в [since, until), страницами по batch"""
+        cursor = (since, -1)
+        while True:
+            rows = self._reminders_page(until, cursor, batch)
+            yield from rows
+            if len(rows) < batch:
+                return
+            cursor = (rows[-1]['due_at'], rows[-1]['id'])
+
+    @timed(DB_SECONDS, 'reminders_page')
+    def _reminders_page(self, until, cursor, batch):
+        return self._execute(DUE_REMINDERS_QUERY, (until, *cursor, batch), fetch='all')
+
+    @timed(DB_SECONDS, 'claim_reminders')
+    def claim_reminders(self, reminders):
+        """Отметить напоминания отправленными (одним UPDATE ... RETURNING)"""
+        task_ids = [task_id for _, task_id in reminders]
+        return self._execute(CLAIM_REMINDERS_QUERY, (task_ids,), fetch='all')
+
+    @timed(DB_SECONDS, 'get_geocode')
+    def get_geocode(self, key):
+        """Координаты города из кэша геокодинга"""
+        return self._execute(
+            'SELECT name, latitude, longitude FROM geocode_cache WHERE key = %s', (key,), fetch='one'
+        )
+
+    @timed(DB_SECONDS, 'save_geocode')
+    def save_geocode(self, key, name, latitude, longitude):
+        """Сохранение координат города в кэш геокодинга"""
+        self._execute(
+            'INSERT INTO geocode_cache (key, name, latitude, longitude) VALUES (%s, %s, %s, %s) '
+            'ON CONFLICT (key) DO UPDATE SET name = EXCLUDED.name, latitude = EXCLUDED.latitude, '
+            "longitude = EXCLUDED.longitude, updated_at = now() AT TIME ZONE 'utc'",
+            (key, name, latitude, longitude)
+        )
@@ -0,0 +1,325 @@
+import asyncio
+import logging
+import time
+from collections import deque
+import aiohttp # type: ignore
+from config import Config
+from utils.metrics import UPSTREAM_SECONDS
+from utils.providers import MISS_STATUSES, NoData
+from utils.helpers import (
+    GEO_URL,
+    WEATHER_URL,
+    build_weather_info,
+    exchange_rate_apis,
+    forecast_cache,
+    geo_cache,
+    geo_params,
+    many_weather_params,
+    parse_many_weather,
+    provider_selector,
+    rate_cache,
+    rate_prefetcher,
+)
+
+_session = None
+
+def get_session():
+    """Общая aiohttp-сессия с пулом keep-alive соединений"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=Config.HTTP_POOL_SIZE,
+            limit_per_host=Config.HTTP_POOL_SIZE,
+            ttl_dns_cache=300,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=Config.HTTP_TIMEOUT),
+        )
+    return _session
+
+async def close_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+# Загрузки в полете по ключу: одновременные промахи кэша ждут одну задачу
+_rate_loads = {}
+_forecast_loads = {}
+
+def _single_flight(loads, key, load):
+    """(задача, запущена ли сейчас): load() выполняется отдельной задачей, одна на key.
+
+    Отмена вызвавшего не отменяет загрузку, поэтому остальные ждущие
+    всегда получают результат.
+    """
+    future = loads.get(key)
+    if future is not None:
+        return future, False
+
+    async def run():
+        try:
+            return await load()
+        finally:
+            del loads[key]
+
+    future = loads[key] = asyncio.ensure_future(run())
+    # фоновое обновление может упасть без ожидающих - помечаем ошибку прочитанной
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    return future, True
+
+async def race(selector, calls):
+    """Асинхронный аналог ProviderSelector.race: функции в calls - корутинные"""
+    pending = deque(selector.order(calls))
+    tasks = {}
+
+    async def run(name, func):
+        start = time.perf_counter()
+        try:
+            value = await func()
+            ok = value is not None
+        except asyncio.CancelledError:
+            selector.record_cancelled(name, time.perf_counter() - start)
+            raise
+        except NoData:
+            value, ok = None, True
+        except Exception as e:
+            logging.warning(f"❌ {name} ошибка: {e}")
+            value, ok = None, False
+        selector.record(name, time.perf_counter() - start, ok)
+        return value
+
+    def launch():
+        name, func = pending.popleft()
+        tasks[asyncio.ensure_future(run(name, func))] = name
+        return name
+
+    current = None
+    try:
+        while pending or tasks:
+            if pending and current is None:
+                current = launch()
+            timeout = selector.hedge_delay(current) if pending else None
+            done, _ = await asyncio.wait(
+                tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                selector.record_hedged(current, timeout)
+                current = None
+                continue
+            for task in done:
+                del tasks[task]
+                if task.result() is not None:
+                    return task.result()
+            current = None
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+
+class AsyncRequestBatcher:
+    """Асинхронный аналог utils.batcher.RequestBatcher: fetch_many - корутинная функция"""
+
+    def __init__(self, fetch_many, window=0.03, max_size=50):
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_size = max_size
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((key, future))
+        if len(self._pending) >= self.max_size:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_now)
+        return await future
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch': self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._flush(batch))
+
+    async def _flush(self, batch):
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = dict(zip(keys, await self.fetch_many(keys)))
+        except Exception as e:
+            logging.warning(f'Ошибка пакетного запроса ({len(keys)} ключей): {e}')
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch:
+            if not future.done():
+                future.set_result(results[key])
+
+async def _fetch_json(api):
+    """Ответ провайдера курсов или None при ошибке"""
+    try:
+        logging.debug('Пробует %s : %s', api['name'], api['url'])
+        with UPSTREAM_SECONDS.labels(api['name']).time():
+            async with get_session().get(api['url']) as response:
+                if response.status == 200:
+                    return await response.json(content_type=None)
+                status = response.status
+        if status in MISS_STATUSES:
+            raise NoData(f"{api['name']}: HTTP {status}")
+        logging.warning(f"❌ {api['name']}: HTTP {status}")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.warning(f"❌ {api['name']} ошибка: {e}")
+    except ValueError as e:
+        logging.warning(f"❌ {api['name']} ошибка парсинга: {e}")
+    return None
+
+def _table_call(api):
+    async def call():
+        data = await _fetch_json(api)
+        if not isinstance(data, dict):
+            return None
+        return api['rates_func'](data) or None
+    return api['name'], call
+
+def _pair_call(api, to_currency):
+    async def call():
+        data = await _fetch_json(api)
+        if not isinstance(data, dict):
+            return None
+        rate = api['parse_func'](data, to_currency)
+        if rate is None:
+            # ответ получен, но такой валюты у провайдера нет
+            raise NoData(f"{api['name']}: курс {to_currency} не найден")
+        return rate
+    return api['name'], call
+
+async def fetch_rate_table(base):
+    """Асинхронный аналог utils.helpers.fetch_rate_table"""
+    calls = [_table_call(api) for api in exchange_rate_apis(base, base) if 'rates_func' in api]
+    return await race(provider_selector, calls)
+
+async def cached_rate_table(base):
+    """Асинхронный аналог RateCache.fetch: одновременные промахи по базе - один запрос"""
+    rates = rate_cache.get_rates(base)
+    if rates is not None:
+        return rates
+
+    async def load():
+        return rate_cache.loaded(base, await fetch_rate_table(base))
+
+    future, leader = _single_flight(_rate_loads, base, load)
+    if leader:
+        return await asyncio.shield(future)
+    rate_cache.coalesced += 1
+    try:
+        return await asyncio.shield(future)
+    except Exception:
+        return None
+
+async def fetch_pair_rate(from_currency, to_currency):
+    """Асинхронный аналог utils.helpers.fetch_pair_rate"""
+    calls = [
+        _pair_call(api, to_currency)
+        for api in exchange_rate_apis(from_currency, to_currency)
+        if 'rates_func' not in api
+    ]
+    return await race(provider_selector, calls)
+
+async def get_exchange_rate(from_currency, to_currency, amount=1):
+    """Асинхронный аналог utils.helpers.get_exchange_rate"""
+    rate = rate_cache.get_rate(from_currency, to_currency)
+    if rate is None:
+        rates = await cached_rate_table(from_currency)
+        rate = rates.get(to_currency) if rates else None
+    if rate is None:
+        rate = await fetch_pair_rate(from_currency, to_currency)
+    if rate is None:
+        logging.warning(f"❌ курс {from_currency} -> {to_currency} не найден")
+        return None, None
+    rate_prefetcher.record(from_currency)
+    return float(amount) * rate, rate
+
+async def fetch_current_weather_many(coordinates):
+    """Асинхронный аналог utils.helpers.fetch_current_weather_many"""
+    params = many_weather_params(coordinates)
+    with UPSTREAM_SECONDS.labels('Open-Meteo').time():
+        async with get_session().get(WEATHER_URL, params=params) as weather_response:
+            weather_response.raise_for_status()
+            weather_data = await weather_response.json(content_type=None)
+    return parse_many_weather(weather_data)
+
+weather_batcher = AsyncRequestBatcher(
+    fetch_current_weather_many,
+    window=Config.WEATHER_BATCH_WINDOW,
+    max_size=Config.WEATHER_BATCH_SIZE,
+)
+
+async def fetch_current_weather(latitude, longitude):
+    """Асинхронный аналог utils.helpers.fetch_current_weather"""
+    if Config.WEATHER_BATCH_WINDOW > 0:
+        return await weather_batcher.submit((latitude, longitude))
+    return (await fetch_current_weather_many([(latitude, longitude)]))[0]
+
+async def cached_current_weather(latitude, longitude):
+    """Асинхронный аналог ForecastCache.get (stale-while-revalidate, один запрос на ячейку)"""
+    key = forecast_cache.cell(latitude, longitude)
+    cached = forecast_cache.peek(key, time.time())
+
+    async def load():
+        value = await fetch_current_weather(latitude, longitude)
+        forecast_cache.store(key, value)
+        return value
+
+    if cached is not None:
+        value, fresh = cached
+        if not fresh:
+            _single_flight(_forecast_loads, key, load)
+        return value
+    future, leader = _single_flight(_forecast_loads, key, load)
+    if leader:
+        forecast_cache.misses += 1
+    else:
+        forecast_cache.coalesced += 1
+    return await asyncio.shield(future)
+
+async def get_weather(city):
+    """Асинхронный аналог utils.helpers.get_weather"""
+    session = get_session()
+    try:
+        location = geo_cache.cached(city) or await asyncio.to_thread(geo_cache.lookup, city)
+        if location is None:
+            with UPSTREAM_SECONDS.labels('Open-Meteo Geocoding').time():
+                async with session.get(GEO_URL, params=geo_params(city)) as geo_response:
+                    geo_response.raise_for_status()
+                    geo_data = await geo_response.json(content_type=None)
+
+            if not geo_data.get('results'):
+                return "city_not_found"
+
+            result = geo_data['results'][0]
+            location = (result['name'], result['latitude'], result['longitude'])
+            await asyncio.to_thread(geo_cache.save, city, *location)
+
+        city_name, latitude, longitude = location
+        current_weather = await cached_current_weather(latitude, longitude)
+        return build_weather_info(city_name, current_weather)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logging.error(f'Ошибка API погоды: {e}')
+        return None
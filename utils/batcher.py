@@ -0,0 +1,74 @@
+import logging
+import threading
+import time
+
+
+class RequestBatcher:
+    """Собирает запросы, пришедшие в течение окна window, в один вызов fetch_many.
+
+    fetch_many(keys) получает список уникальных ключей и возвращает список
+    результатов в том же порядке. Пачка отправляется по истечении окна
+    или при наборе max_size ключей.
+    """
+
+    def __init__(self, fetch_many, window=0.03, max_size=50):
+        self.fetch_many = fetch_many
+        self.window = window
+        self.max_size = max_size
+        self._cond = threading.Condition()
+        self._pending = []
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, key):
+        """Результат для ключа (блокируется до выполнения пачки)"""
+        waiter = {'event': threading.Event(), 'value': None, 'error': None}
+        with self._cond:
+            self._pending.append((key, waiter))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='batcher', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        waiter['event'].wait()
+        if waiter['error'] is not None:
+            raise waiter['error']
+        return waiter['value']
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'avg_batch': self.items / self.batches if self.batches else 0.0,
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.window
+                while len(self._pending) < self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending[:self.max_size]
+                self._pending = self._pending[self.max_size:]
+            threading.Thread(target=self._flush, args=(batch,), daemon=True).start()
+
+    def _flush(self, batch):
+        keys = list(dict.fromkeys(key for key, _ in batch))
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = dict(zip(keys, self.fetch_many(keys)))
+            for key, waiter in batch:
+                waiter['value'] = results[key]
+        except Exception as e:
+            logging.warning(f'Ошибка пакетного запроса ({len(keys)} ключей): {e}')
+            for _, waiter in batch:
+                waiter['error'] = e
+        finally:
+            for _, waiter in batch:
+                waiter['event'].set()
@@ -0,0 +1,110 @@
+import logging
+import queue
+import threading
+import time
+
+
+class ChatDispatcher:
+    """Пул воркеров для параллельной обработки апдейтов.
+
+    Апдейты одного чата всегда попадают в одну и ту же очередь
+    (по chat_id), поэтому порядок внутри чата сохраняется, а медленный
+    /weather одного пользователя не блокирует остальных.
+    latency - гистограмма (utils.metrics) для времени обработки задачи.
+    """
+
+    def __init__(self, workers=8, queue_size=1000, latency=None):
+        self.workers = workers
+        self.latency = latency
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self._threads = []
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.busy = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start(self):
+        """Запустить потоки-воркеры"""
+        for index, tasks in enumerate(self._queues):
+            thread = threading.Thread(
+                target=self._worker, args=(tasks,), name=f'dispatch-{index}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, chat_id, func, *args):
+        """Поставить задачу в очередь чата (блокируется, если очередь заполнена)"""
+        self._queues[hash(chat_id) % self.workers].put((func, args))
+
+    def stop(self, wait=True):
+        """Остановить воркеры после обработки уже поставленных задач"""
+        for tasks in self._queues:
+            tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def join(self):
+        """Дождаться обработки всех поставленных задач"""
+        for tasks in self._queues:
+            tasks.join()
+
+    def queue_depth(self):
+        return sum(tasks.qsize() for tasks in self._queues)
+
+    def stats(self):
+        """Метрики: глубина очереди и время обработки"""
+        with self._lock:
+            avg = self.latency_total / self.processed if self.processed else 0.0
+            return {
+                'queue_depth': self.queue_depth(),
+                'busy': self.busy,
+                'processed': self.processed,
+                'failed': self.failed,
+                'latency_avg': avg,
+                'latency_max': self.latency_max,
+            }
+
+    def _worker(self, tasks):
+        while True:
+            item = tasks.get()
+            if item is None:
+                tasks.task_done()
+                return
+            func, args = item
+            with self._lock:
+                self.busy += 1
+            start = time.perf_counter()
+            failed = False
+            try:
+                func(*args)
+            except Exception as e:
+                failed = True
+                logging.error(f'Ошибка обработки апдейта: {e}')
+            finally:
+                elapsed = time.perf_counter() - start
+                if self.latency is not None:
+                    self.latency.observe(elapsed)
+                with self._lock:
+                    self.busy -= 1
+                    self.processed += 1
+                    self.failed += failed
+                    self.latency_total += elapsed
+                    self.latency_max = max(self.latency_max, elapsed)
+                tasks.task_done()
+
+
+def update_chat_id(update):
+    """chat_id апдейта для маршрутизации (или id апдейта, если чата нет)"""
+    for field in ('message', 'edited_message', 'channel_post', 'edited_channel_post'):
+        message = getattr(update, field, None)
+        if message is not None:
+            return message.chat.id
+    callback_query = getattr(update, 'callback_query', None)
+    if callback_query is not None and callback_query.message is not None:
+        return callback_query.message.chat.id
+    return update.update_id
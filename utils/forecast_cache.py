@@ -0,0 +1,114 @@
+import logging
+import math
+import threading
+import time
+
+
+class ForecastCache:
+    """Кэш текущей погоды по ячейкам сетки координат.
+
+    Координаты округляются до шага grid (в градусах), запись живет до
+    следующего обновления данных Open-Meteo (кратно interval секунд) плюс lag.
+    Просроченная запись еще stale секунд отдается сразу, а обновление идет
+    в фоне (stale-while-revalidate). Одновременные промахи по одной ячейке
+    объединяются в один запрос.
+    """
+
+    def __init__(self, grid=0.1, interval=900, lag=60, stale=900):
+        self.grid = grid
+        self.interval = interval
+        self.lag = lag
+        self.stale = stale
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+
+    def cell(self, latitude, longitude):
+        return (round(latitude / self.grid), round(longitude / self.grid))
+
+    def expires_at(self, fetched_at):
+        """Момент следующего обновления данных у Open-Meteo"""
+        return (math.floor(fetched_at / self.interval) + 1) * self.interval + self.lag
+
+    def peek(self, key, now):
+        """(значение, свежее ли) для ячейки или None, если отдавать нечего"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if now < expires_at:
+            self.hits += 1
+            return value, True
+        if now < expires_at + self.stale:
+            self.stale_hits += 1
+            return value, False
+        return None
+
+    def get(self, latitude, longitude, loader):
+        """Погода для координат; loader(latitude, longitude) ходит в API"""
+        key = self.cell(latitude, longitude)
+        now = time.time()
+        with self._lock:
+            cached = self.peek(key, now)
+            if cached is not None:
+                value, fresh = cached
+                if not fresh and key not in self._inflight:
+                    self._inflight[key] = {'event': threading.Event(), 'value': None, 'error': None}
+                    threading.Thread(
+                        target=self._refresh, args=(key, latitude, longitude, loader), daemon=True
+                    ).start()
+                return value
+            waiter = self._inflight.get(key)
+            leader = waiter is None
+            if leader:
+                self.misses += 1
+                waiter = self._inflight[key] = {'event': threading.Event(), 'value': None, 'error': None}
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._refresh(key, latitude, longitude, loader)
+        else:
+            waiter['event'].wait()
+        if waiter['error'] is not None:
+            raise waiter['error']
+        return waiter['value']
+
+    def stats(self):
+        return {
+            'cells': len(self._entries),
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'refreshes': self.refreshes,
+        }
+
+    def store(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._entries[key] = (self.expires_at(now), value)
+            self.refreshes += 1
+            # выбрасываем записи, которые уже нельзя отдать даже как устаревшие
+            if len(self._entries) > 1024 and self.refreshes % 256 == 0:
+                for cell, (expires_at, _) in list(self._entries.items()):
+                    if now > expires_at + self.stale:
+                        del self._entries[cell]
+
+    def _refresh(self, key, latitude, longitude, loader):
+        waiter = self._inflight[key]
+        try:
+            waiter['value'] = loader(latitude, longitude)
+            self.store(key, waiter['value'])
+        except Exception as e:
+            logging.warning(f'Ошибка обновления прогноза {key}: {e}')
+            waiter['error'] = e
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            waiter['event'].set()
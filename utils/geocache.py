@@ -0,0 +1,149 @@
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+# Транслитерация кириллицы: "Москва" и "Moskva" дают один ключ
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ж': 'zh',
+    'з': 'z', 'и': 'i', 'й': 'i', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n',
+    'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f',
+    'х': 'h', 'ц': 'c', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'y',
+    'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+})
+
+# Варианты латинского написания, сводимые к одному
+LATIN_VARIANTS = (
+    ('shch', 'sh'), ('kh', 'h'), ('ts', 'c'), ('tz', 'c'), ('yo', 'e'),
+    ('jo', 'e'), ('ja', 'ya'), ('ju', 'yu'), ('ia', 'ya'), ('iu', 'yu'),
+    ('iy', 'i'), ('yi', 'i'), ('ij', 'i'), ('w', 'v'), ('j', 'i'), ('ii', 'i'),
+)
+
+# Крупные города для ответа без сети: название, широта, долгота, синонимы
+OFFLINE_CITIES = (
+    ('Москва', 55.75222, 37.61556, ('moscow',)),
+    ('Санкт-Петербург', 59.93863, 30.31413, ('saint petersburg', 'st petersburg', 'питер', 'спб')),
+    ('Новосибирск', 55.0415, 82.9346, ('novosibirsk',)),
+    ('Екатеринбург', 56.8519, 60.6122, ('yekaterinburg', 'ekaterinburg')),
+    ('Казань', 55.78874, 49.12214, ('kazan',)),
+    ('Нижний Новгород', 56.32867, 44.00205, ('nizhny novgorod',)),
+    ('Челябинск', 55.15402, 61.42915, ('chelyabinsk',)),
+    ('Самара', 53.20007, 50.15, ('samara',)),
+    ('Омск', 54.99244, 73.36859, ('omsk',)),
+    ('Ростов-на-Дону', 47.23135, 39.72328, ('rostov-on-don', 'ростов')),
+    ('Уфа', 54.74306, 55.96779, ('ufa',)),
+    ('Красноярск', 56.01839, 92.86717, ('krasnoyarsk',)),
+    ('Воронеж', 51.67204, 39.1843, ('voronezh',)),
+    ('Пермь', 58.01046, 56.25017, ('perm',)),
+    ('Волгоград', 48.71939, 44.50183, ('volgograd',)),
+    ('Краснодар', 45.04484, 38.97603, ('krasnodar',)),
+    ('Сочи', 43.59917, 39.72569, ('sochi',)),
+    ('Владивосток', 43.10562, 131.87353, ('vladivostok',)),
+    ('Калининград', 54.70649, 20.51095, ('kaliningrad',)),
+    ('Минск', 53.9, 27.56667, ('minsk',)),
+    ('Киев', 50.45466, 30.5238, ('kyiv', 'kiev', 'київ')),
+    ('Алматы', 43.25, 76.91667, ('almaty', 'алма-ата')),
+    ('Астана', 51.1801, 71.44598, ('astana',)),
+    ('Ташкент', 41.26465, 69.21627, ('tashkent',)),
+    ('Тбилиси', 41.69411, 44.83368, ('tbilisi',)),
+    ('Ереван', 40.18111, 44.51361, ('yerevan',)),
+    ('Лондон', 51.50853, -0.12574, ('london',)),
+    ('Париж', 48.85341, 2.3488, ('paris',)),
+    ('Берлин', 52.52437, 13.41053, ('berlin',)),
+    ('Нью-Йорк', 40.71427, -74.00597, ('new york', 'nyc')),
+    ('Стамбул', 41.01384, 28.94966, ('istanbul',)),
+    ('Дубай', 25.07725, 55.30927, ('dubai',)),
+    ('Пекин', 39.9075, 116.39723, ('beijing',)),
+    ('Токио', 35.6895, 139.69171, ('tokyo',)),
+)
+
+
+def normalize_city(city):
+    """Ключ кэша: регистр, ё/е, пробелы/дефисы и транслитерация сведены к одному виду"""
+    key = city.strip().lower().replace('ё', 'е')
+    key = re.sub(r'[\s\-_.,]+', ' ', key).strip()
+    key = key.translate(TRANSLIT)
+    for variant, canonical in LATIN_VARIANTS:
+        key = key.replace(variant, canonical)
+    return key
+
+
+class GeoCache:
+    """Кэш геокодинга: LRU в памяти -> офлайн-индекс городов -> таблица в SQLite"""
+
+    def __init__(self, max_size=1024, offline=True, store=None):
+        self.max_size = max_size
+        self.store = store
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._offline = {}
+        if offline:
+            for name, latitude, longitude, aliases in OFFLINE_CITIES:
+                for alias in (name,) + aliases:
+                    self._offline[normalize_city(alias)] = (name, latitude, longitude)
+        self.memory_hits = 0
+        self.offline_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def cached(self, city):
+        """Поиск без обращения к БД: память и офлайн-индекс"""
+        key = normalize_city(city)
+        with self._lock:
+            location = self._memory.get(key)
+            if location is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return location
+        location = self._offline.get(key)
+        if location is not None:
+            self.offline_hits += 1
+            self._remember(key, location)
+        return location
+
+    def lookup(self, city):
+        """Координаты города (название, широта, долгота) или None"""
+        location = self.cached(city)
+        if location is not None or self.store is None:
+            if location is None:
+                self.misses += 1
+            return location
+
+        key = normalize_city(city)
+        try:
+            row = self.store.get_geocode(key)
+        except Exception as e:
+            logging.warning(f'Ошибка чтения кэша геокодинга: {e}')
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        location = (row['name'], row['latitude'], row['longitude'])
+        self.store_hits += 1
+        self._remember(key, location)
+        return location
+
+    def save(self, city, name, latitude, longitude):
+        key = normalize_city(city)
+        self._remember(key, (name, latitude, longitude))
+        if self.store is not None:
+            try:
+                self.store.save_geocode(key, name, latitude, longitude)
+            except Exception as e:
+                logging.warning(f'Ошибка записи кэша геокодинга: {e}')
+
+    def stats(self):
+        return {
+            'memory_hits': self.memory_hits,
+            'offline_hits': self.offline_hits,
+            'store_hits': self.store_hits,
+            'misses': self.misses,
+            'size': len(self._memory),
+        }
+
+    def _remember(self, key, location):
+        with self._lock:
+            self._memory[key] = location
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
@@ -1,133 +1,342 @@
-import requests # type: ignore
 import logging
-from telebot import types # type: ignore
+import threading
+from urllib.parse import urlsplit
 from config import Config
+from utils.batcher import RequestBatcher
+from utils.messages import format_tasks_page
+from utils.metrics import UPSTREAM_SECONDS
+from utils.forecast_cache import ForecastCache
+from utils.geocache import GeoCache
+from utils.prefetcher import RatePrefetcher
+from utils.providers import MISS_STATUSES, NoData, ProviderSelector
+from utils.rate_cache import RateCache
+
+# telebot.types и requests импортируются при первом использовании: импорт модуля не тянет их на старте
+_main_keyboard = None
 
 def create_main_keyboard():
-    """Создание основной клавиатуры"""
-    keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
-    buttons = [
-        types.KeyboardButton("Мои задачи"),
-        types.KeyboardButton("Конвертер"),
-        types.KeyboardButton("Погода"),
-        types.KeyboardButton("Случайность"),
-    ]
-    keyboard.add(*buttons)
+    """Основная клавиатура (одна на все ответы, собирается при первом вызове)"""
+    global _main_keyboard
+    if _main_keyboard is None:
+        from telebot import types # type: ignore
+        keyboard = types.ReplyKeyboardMarkup(resize_keyboard=True, row_width=2)
+        buttons = [
+            types.KeyboardButton("Мои задачи"),
+            types.KeyboardButton("Конвертер"),
+            types.KeyboardButton("Погода"),
+            types.KeyboardButton("Случайность"),
+        ]
+        keyboard.add(*buttons)
+        _main_keyboard = keyboard
+    return _main_keyboard
+
+def encode_task_cursor(task):
+    """Курсор страницы задач для callback_data: created_at|id"""
+    return f"{task['created_at']}|{task['id']}"
+
+def decode_task_cursor(value):
+    created_at, task_id = value.rsplit('|', 1)
+    return created_at, int(task_id)
+
+def create_tasks_keyboard(prev_cursor=None, next_cursor=None):
+    """Кнопки листания списка задач (None, если листать некуда)"""
+    from telebot import types # type: ignore
+    buttons = []
+    if prev_cursor:
+        buttons.append(types.InlineKeyboardButton("◀️ Назад", callback_data=f"tasks:prev:{prev_cursor}"))
+    if next_cursor:
+        buttons.append(types.InlineKeyboardButton("Вперед ▶️", callback_data=f"tasks:next:{next_cursor}"))
+    if not buttons:
+        return None
+    keyboard = types.InlineKeyboardMarkup()
+    keyboard.row(*buttons)
     return keyboard
 
-def get_exchange_rate(from_currency, to_currency, amount=1):
-    apis_to_try = [
-        # ExchangeRate-API
-        {
-            'name': 'ExchangeRate-API',
-            'url': f'https://api.exchangerate-api.com/v4/latest/{from_currency}',
-            'parse_func': lambda data, to_curr: data.get('rates', {}).get(to_curr)
-        },
-        # CurrencyAPI
-        {
-            'name': 'CurrencyAPI',
-            'url': f'https://cdn.jsdelivr.net/gh/fawazahmed0/currency-api@1/latest/currencies/{from_currency.lower()}/{to_currency.lower()}.json',
-            'parse_func': lambda data, to_curr: data.get(to_currency.lower())
-        },
-        #Open Exchange Rates
+# Провайдеры курсов в порядке приоритета
+EXCHANGE_RATE_APIS = [
+    # ExchangeRate-API
+    {
+        'name': 'ExchangeRate-API',
+        'url': 'https://api.exchangerate-api.com/v4/latest/{base}',
+        'parse_func': lambda data, to_curr: data.get('rates', {}).get(to_curr),
+        'rates_func': lambda data: data.get('rates')
+    },
+    # CurrencyAPI
+    {
+        'name': 'CurrencyAPI',
+        'url': 'https://cdn.jsdelivr.net/gh/fawazahmed0/currency-api@1/latest/currencies/{base_lower}/{target_lower}.json',
+        'parse_func': lambda data, to_curr: data.get(to_curr.lower())
+    },
+    #Open Exchange Rates
+    {
+        'name': 'OpenExchangeRates',
+        'url': "https://open.er-api.com/v6/latest/{base}",
+        'parse_func' : lambda data, to_curr : data.get('rates', {}).get(to_curr),
+        'rates_func': lambda data: data.get('rates')
+    }
+]
+
+def upstream_url(url):
+    """URL внешнего API; при заданном UPSTREAM_BASE_URL меняется только адрес сервера"""
+    if not Config.UPSTREAM_BASE_URL:
+        return url
+    parts = urlsplit(url)
+    query = f'?{parts.query}' if parts.query else ''
+    return f'{Config.UPSTREAM_BASE_URL.rstrip("/")}{parts.path}{query}'
+
+GEO_URL = upstream_url("https://geocoding-api.open-meteo.com/v1/search")
+WEATHER_URL = upstream_url(Config.WEATHER_URL)
+
+WEATHER_DESCRIPTIONS = {
+    0: "ясно", 1: "преимущественно ясно", 2: "переменная облачность",
+    3: "пасмурно", 45: "туман", 48: "туман", 51: "легкая морось",
+    53: "умеренная морось", 55: "сильная морось", 56: "легкая ледяная морось",
+    57: "сильная ледяная морось", 61: "небольшой дождь", 63: "умеренный дождь",
+    65: "сильный дождь", 66: "ледяной дождь", 67: "сильный ледяной дождь",
+    71: "небольшой снег", 73: "умеренный снег", 75: "сильный снег",
+    77: "снежные зерна", 80: "небольшие ливни", 81: "умеренные ливни",
+    82: "сильные ливни", 85: "небольшие снегопады", 86: "сильные снегопады",
+    95: "гроза", 96: "гроза с градом", 99: "сильная гроза с градом"
+}
+
+# Кэш таблиц курсов по базовой валюте
+rate_cache = RateCache(ttl=Config.RATE_CACHE_TTL, max_bases=Config.RATE_CACHE_SIZE)
+
+# Выбор провайдера курсов: хеджирование, EWMA, предохранители
+provider_selector = ProviderSelector(
+    percentile=Config.HEDGE_PERCENTILE,
+    min_delay=Config.HEDGE_MIN_DELAY,
+    max_delay=Config.HEDGE_MAX_DELAY,
+    failure_threshold=Config.CIRCUIT_FAILURES,
+    cooldown=Config.CIRCUIT_COOLDOWN,
+)
+
+# Кэш геокодинга; постоянное хранилище (Database) подключается в bot.py
+geo_cache = GeoCache(max_size=Config.GEO_CACHE_SIZE, offline=Config.GEO_OFFLINE_INDEX)
+
+# Кэш текущей погоды по сетке координат
+forecast_cache = ForecastCache(
+    grid=Config.FORECAST_GRID,
+    interval=Config.FORECAST_INTERVAL,
+    stale=Config.FORECAST_STALE,
+)
+
+# Общая сессия: keep-alive соединения переиспользуются между запросами
+_http = None
+_http_lock = threading.Lock()
+
+def get_http():
+    """Сессия requests с пулом соединений (создается при первом запросе)"""
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                import requests # type: ignore
+                import requests.adapters # type: ignore
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=Config.HTTP_POOL_SIZE, pool_maxsize=Config.HTTP_POOL_SIZE
+                )
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http = session
+    return _http
+
+def build_tasks_page(db, user_id, cursor=None, backward=False):
+    """Текст и клавиатура страницы задач; (None, None), если задач нет"""
+    tasks, has_more = db.get_user_tasks_page(
+        user_id, cursor, backward, limit=Config.TASKS_PAGE_SIZE
+    )
+    if not tasks:
+        return None, None
+    text, shown = format_tasks_page(tasks, Config.UTC_OFFSET)
+    truncated = shown < len(tasks)
+    has_prev = has_more if backward else cursor is not None
+    has_next = True if backward else has_more or truncated
+    keyboard = create_tasks_keyboard(
+        encode_task_cursor(tasks[0]) if has_prev else None,
+        encode_task_cursor(tasks[shown - 1]) if has_next else None,
+    )
+    return text, keyboard
+
+def exchange_rate_apis(from_currency, to_currency):
+    """Список провайдеров курса с подставленными URL"""
+    return [
         {
-            'name': 'OpenExchangeRates',
-            'url': f"https://open.er-api.com/v6/latest/{from_currency}",
-            'parse_func' : lambda data, to_curr : data.get('rates', {}).get(to_curr)
+            **api,
+            'url': upstream_url(api['url']).format(
+                base=from_currency,
+                base_lower=from_currency.lower(),
+                target_lower=to_currency.lower(),
+            ),
         }
+        for api in EXCHANGE_RATE_APIS
     ]
 
-    for api in apis_to_try:
-        try:
-            logging.info(f"Пробует {api['name']} : {api['url']}")
-            response = requests.get(api['url'], timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                rate = api['parse_func'](data,to_currency)
-
-                if rate is not None:
-                    converted_amount = float(amount) * rate
-                    logging.info(f"{api['name']} успешен")
-                    return converted_amount, rate
-                else:
-                    logging.warning(f"❌ {api['name']}: курс {to_currency} не найден")
-
-            else:
-                logging.warning(f"❌ {api['name']}: HTTP {response.status_code}")
-            
-
-        except requests.exceptions.RequestException as e:
-            logging.warning(f"❌ {api['name']} ошибка: {e}")
-        except Exception as e:
-            logging.warning(f"❌ {api['name']} ошибка парсинга: {e}") 
-
-        return get_exchange_rate(from_currency, to_currency, amount)
-            
+def geo_params(city):
+    return {
+        'name': city,
+        'count': 1,
+        'language': 'ru',
+        'format': 'json'
+    }
+
+def weather_params(latitude, longitude):
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'current_weather': 'true',
+        'timezone': 'auto'
+    }
+
+def build_weather_info(city_name, current_weather):
+    """Данные о погоде в формате, который ожидают обработчики"""
+    temperature = current_weather['temperature']
+    description = WEATHER_DESCRIPTIONS.get(current_weather['weathercode'], "неизвестно")
+    return {
+        'city': city_name,
+        'description': description,
+        'temperature': temperature,
+        'humidity': 'N/A',
+        'feels_like': temperature,
+    }
+
+def _fetch_json(api):
+    """Ответ провайдера курсов или None при ошибке"""
+    try:
+        logging.debug('Пробует %s : %s', api['name'], api['url'])
+        with UPSTREAM_SECONDS.labels(api['name']).time():
+            response = get_http().get(api['url'], timeout=Config.HTTP_TIMEOUT)
+        if response.status_code == 200:
+            return response.json()
+        if response.status_code in MISS_STATUSES:
+            raise NoData(f"{api['name']}: HTTP {response.status_code}")
+        logging.warning(f"❌ {api['name']}: HTTP {response.status_code}")
+    except OSError as e:
+        # requests.RequestException наследует OSError - ловим без импорта requests
+        logging.warning(f"❌ {api['name']} ошибка: {e}")
+    except ValueError as e:
+        logging.warning(f"❌ {api['name']} ошибка парсинга: {e}")
+    return None
+
+def _table_call(api):
+    def call():
+        data = _fetch_json(api)
+        if not isinstance(data, dict):
+            return None
+        return api['rates_func'](data) or None
+    return api['name'], call
+
+def _pair_call(api, to_currency):
+    def call():
+        data = _fetch_json(api)
+        if not isinstance(data, dict):
+            return None
+        rate = api['parse_func'](data, to_currency)
+        if rate is None:
+            # ответ получен, но такой валюты у провайдера нет
+            raise NoData(f"{api['name']}: курс {to_currency} не найден")
+        return rate
+    return api['name'], call
+
+def fetch_rate_table(base):
+    """Полная таблица курсов для базовой валюты от самого быстрого провайдера"""
+    calls = [_table_call(api) for api in exchange_rate_apis(base, base) if 'rates_func' in api]
+    return provider_selector.race(calls)
+
+def fetch_pair_rate(from_currency, to_currency):
+    """Курс пары от провайдеров, которые не отдают полную таблицу"""
+    calls = [
+        _pair_call(api, to_currency)
+        for api in exchange_rate_apis(from_currency, to_currency)
+        if 'rates_func' not in api
+    ]
+    return provider_selector.race(calls)
+
+# Фоновое обновление таблиц курсов популярных баз (запускается в bot.py)
+rate_prefetcher = RatePrefetcher(
+    rate_cache,
+    fetch_rate_table,
+    top_n=Config.RATE_PREFETCH_TOP,
+    interval=Config.RATE_PREFETCH_INTERVAL,
+    seed_bases=[base for base in Config.RATE_PREFETCH_BASES.split(',') if base],
+)
+
+def get_exchange_rate(from_currency, to_currency, amount=1):
+    rate = rate_cache.get_rate(from_currency, to_currency)
+    if rate is None:
+        rates = rate_cache.fetch(from_currency, fetch_rate_table)
+        rate = rates.get(to_currency) if rates else None
+    if rate is None:
+        rate = fetch_pair_rate(from_currency, to_currency)
+    if rate is None:
+        logging.warning(f"❌ курс {from_currency} -> {to_currency} не найден")
+        return None, None
+    # в популярность идут только базы, для которых курс нашелся
+    rate_prefetcher.record(from_currency)
+    return float(amount) * rate, rate
+
+def many_weather_params(coordinates):
+    """Параметры запроса погоды сразу для нескольких точек"""
+    return weather_params(
+        ','.join(str(latitude) for latitude, _ in coordinates),
+        ','.join(str(longitude) for _, longitude in coordinates),
+    )
+
+def parse_many_weather(data):
+    """Open-Meteo отвечает объектом для одной точки и списком для нескольких"""
+    if isinstance(data, dict):
+        data = [data]
+    return [item['current_weather'] for item in data]
+
+def fetch_current_weather_many(coordinates):
+    """Текущая погода для списка координат одним запросом к Open-Meteo"""
+    with UPSTREAM_SECONDS.labels('Open-Meteo').time():
+        weather_response = get_http().get(
+            WEATHER_URL,
+            params=many_weather_params(coordinates),
+            timeout=Config.HTTP_TIMEOUT
+        )
+    weather_response.raise_for_status()
+    return parse_many_weather(weather_response.json())
+
+# Пакетирование запросов погоды: точки, запрошенные в одном окне, уходят одним вызовом
+weather_batcher = RequestBatcher(
+    fetch_current_weather_many,
+    window=Config.WEATHER_BATCH_WINDOW,
+    max_size=Config.WEATHER_BATCH_SIZE,
+)
+
+def fetch_current_weather(latitude, longitude):
+    """Текущая погода из Open-Meteo для координат"""
+    if Config.WEATHER_BATCH_WINDOW > 0:
+        return weather_batcher.submit((latitude, longitude))
+    return fetch_current_weather_many([(latitude, longitude)])[0]
+
 def get_weather(city):
     """
     Погода через Open-Meteo API (бесплатный, не требует ключа)
     Возвращает текущую погоду для города
     """
     try:
-        geo_url = "https://geocoding-api.open-meteo.com/v1/search"
-        geo_params = {
-            'name': city,
-            'count': 1,
-            'language': 'ru',
-            'format': 'json'
-        }
-        
-        geo_response = requests.get(geo_url, params=geo_params, timeout=10)
-        geo_response.raise_for_status()
-        geo_data = geo_response.json()
-        
-        if not geo_data.get('results'):
-            return "city_not_found"
-        
-        location = geo_data['results'][0]
-        latitude = location['latitude']
-        longitude = location['longitude']
-        city_name = location['name']
-        
-        weather_url = "https://api.open-meteo.com/v1/forecast"
-        weather_params = {
-            'latitude': latitude,
-            'longitude': longitude,
-            'current_weather': 'true',
-            'timezone': 'auto'
-        }
-        
-        weather_response = requests.get(weather_url, params=weather_params, timeout=10)
-        weather_response.raise_for_status()
-        weather_data = weather_response.json()
-        
-        current_weather = weather_data['current_weather']
-        temperature = current_weather['temperature']
-        weather_code = current_weather['weathercode']
-        
-        weather_descriptions = {
-            0: "ясно", 1: "преимущественно ясно", 2: "переменная облачность",
-            3: "пасмурно", 45: "туман", 48: "туман", 51: "легкая морось",
-            53: "умеренная морось", 55: "сильная морось", 56: "легкая ледяная морось",
-            57: "сильная ледяная морось", 61: "небольшой дождь", 63: "умеренный дождь",
-            65: "сильный дождь", 66: "ледяной дождь", 67: "сильный ледяной дождь",
-            71: "небольшой снег", 73: "умеренный снег", 75: "сильный снег",
-            77: "снежные зерна", 80: "небольшие ливни", 81: "умеренные ливни",
-            82: "сильные ливни", 85: "небольшие снегопады", 86: "сильные снегопады",
-            95: "гроза", 96: "гроза с градом", 99: "сильная гроза с градом"
-        }
-        
-        description = weather_descriptions.get(weather_code, "неизвестно")
-        
-        weather_info = {
-            'city': city_name,
-            'description': description,
-            'temperature': temperature,
-            'humidity': 'N/A',
-            'feels_like': temperature,
-        }
-        return weather_info
+        location = geo_cache.lookup(city)
+        if location is None:
+            with UPSTREAM_SECONDS.labels('Open-Meteo Geocoding').time():
+                geo_response = get_http().get(GEO_URL, params=geo_params(city), timeout=Config.HTTP_TIMEOUT)
+            geo_response.raise_for_status()
+            geo_data = geo_response.json()
+
+            if not geo_data.get('results'):
+                return "city_not_found"
+
+            result = geo_data['results'][0]
+            location = (result['name'], result['latitude'], result['longitude'])
+            geo_cache.save(city, *location)
+
+        city_name, latitude, longitude = location
+        current_weather = forecast_cache.get(latitude, longitude, fetch_current_weather)
+        return build_weather_info(city_name, current_weather)
         
-    except requests.exceptions.RequestException as e:
+    except OSError as e:
         logging.error(f'Ошибка API погоды: {e}')
         return None
\ No newline at end of file
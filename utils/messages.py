@@ -0,0 +1,173 @@
+"""Тексты ответов бота, общие для синхронной и асинхронной версий"""
+from datetime import datetime, timedelta, timezone
+
+WELCOME_TEXT = """
+🤖 Добро пожаловать в SmartHelperBot!
+
+Я ваш универсальный помощник в Telegram. Вот что я умею:
+
+📝 *Управление задачами* - создавайте и управляйте списком дел
+💱 *Конвертер валют* - актуальные курсы валют
+🌤️ *Погода* - текущая погода в любом городе
+🎲 *Случайность* - генератор чисел и помощник в выборе
+
+Используйте кнопки меню или команды для навигации!
+    """
+
+HELP_TEXT = """
+    📋 *Доступные команды:*
+
+    *Управление задачами:*
+    /todo add [задача] - добавить таск
+    /todo add [задача] at 18:00 - таск с напоминанием (или at 25.12 18:00)
+    /todo list - показать таски  
+    /todo delete [номер] - удалить таск
+
+    *Конвертер валют:*
+    /currency [сумма] [из] [в]
+    Пример: `/currency 100 USD RUB`
+
+    *Погода:*
+    /weather [город]
+    Пример: `/weather Москва`
+
+    *Случайность:*
+    /random number [от] [до]
+    Пример: `/random number 1 100` 
+    /random choice [варианты] - Случайный выбор
+    Пример: `/random choice пицца сыр колбаска`
+        """
+
+CURRENCY_USAGE_TEXT = (
+    "💱 *Конвертер валют*\n\n"
+    "❌ *Неверный формат команды*\n\n"
+    "Используйте:\n`/currency [сумма] [из] [в]`\n\n"
+    "*Пример:*\n`/currency 100 USD RUB`\n"
+    "*Поддерживаемые валюты:* USD, EUR, RUB, GBP, JPY, CNY, etc."
+)
+
+CURRENCY_FAILED_TEXT = (
+    f"❌ Не удалось получить курс валют.\n\n"
+    f"*Возможные причины:*\n"
+    f"• Неправильные коды валют\n"  
+    f"• Временные проблемы с API\n"
+    f"• Попробуйте другие валюты\n\n"
+    f"*Пример:* `/currency 1 USD EUR`"
+)
+
+CURRENCY_AMOUNT_INVALID_TEXT = "❌ Неверный формат суммы. Используйте числа, например: 100 или 50.5"
+
+CONVERTER_HINT_TEXT = '💱 *Конвертер валют* \n\nИспользуйте формат:\n`/currency 100 USD RUB`'
+
+WEATHER_HINT_TEXT = '🌤️ *Погода*\n\nВведите команду:\n`/weather Москва`'
+
+TODO_ADD_USAGE_TEXT = "❌ Укажите задачу: `/todo add Ваша задача`"
+
+TODO_DELETE_USAGE_TEXT = "❌ Укажите номер задачи: `/todo delete 1`"
+
+RANDOM_NUMBER_INVALID_TEXT = "❌ Неверный формат чисел. Используйте: `/random number 1 100`"
+
+WEATHER_USAGE_TEXT = (
+    "🌤️ *Погода*\n\n"
+    "❌ *Укажите город*\n\n"
+    "Пример:\n`/weather Москва`"
+)
+
+WEATHER_FAILED_TEXT = "❌ Не удалось получить данные о погоде. Проверьте название города."
+
+RANDOM_OPTIONS_TEXT = (
+    "🎲 *Модуль случайностей*\n\n"
+    "*Случайное число:*\n`/random number 1 100`\n\n"
+    "*Случайный выбор:*\n`/random choice пицца суши паста`\n\n"
+    "*Примеры:*\n"
+    "• `/random number 1 50` - число от 1 до 50\n"
+    "• `/random choice кофе чай сок` - выбор напитка\n"
+    "• `/random choice да нет` - простой выбор"
+)
+
+WEATHER_EMOJIS = {
+    'clear': "☀️",
+    'cloud': "☁️",
+    'rain': "🌧️",
+    'snow': "❄️", 
+    'thunderstorm': "⛈️",
+    'drizzle': "🌦️",
+    'mist': "🌫️",
+}
+
+def rate_limited_text(retry_after):
+    """Ответ на превышение лимита запросов"""
+    return f"⏳ Слишком много запросов. Попробуйте через {max(1, round(retry_after))} сек."
+
+def random_number_usage(words):
+    """Подсказка /random number с тем, что прислал пользователь"""
+    received = ' '.join(['number'] + words)
+    return f"❌ Укажите диапазон: `/random number 1 100`\n\nПолучено: {received}"
+
+def format_currency_result(amount, from_currency, to_currency, converted_amount, rate):
+    return (
+        f"💱 *Результат конвертации:*\n\n"
+        f"*{amount} {from_currency}* = *{converted_amount:.2f} {to_currency}*\n"
+        f"Курс: 1 {from_currency} = {rate:.4f} {to_currency}"
+    )
+
+def format_weather(weather_data):
+    description = weather_data['description']
+    emoji = '🌤️'
+    for key, value in WEATHER_EMOJIS.items():
+        if key in description.lower():
+            emoji = value
+            break
+
+    return (
+        f"{emoji} *Погода в {weather_data['city']}*\n\n"
+        f"*Описание:* {description.capitalize()}\n"
+        f"*Температура:* {weather_data['temperature']:.1f}°C\n"
+        f"*Ощущается как:* {weather_data['feels_like']:.1f}°C\n"
+        f"*Влажность:* {weather_data['humidity']}%"
+    )
+
+TASKS_EMPTY_TEXT = '📝 *Список задач пуст*\n\nДобавьте задачу: `/todo add Ваша задача`'
+TASKS_HEADER = '📝 *Ваши задачи:*\n\n'
+TASKS_FOOTER = "\nУдалить задачу: `/todo delete номер`"
+
+# Лимит Telegram на длину сообщения и на длину одной задачи в списке
+MESSAGE_LIMIT = 4096
+TASK_PREVIEW_LIMIT = 300
+
+def format_due(due_at, utc_offset=0):
+    """Срок задачи для пользователя: дд.мм чч:мм в его часовом поясе"""
+    return datetime.fromtimestamp(due_at, timezone(timedelta(hours=utc_offset))).strftime('%d.%m %H:%M')
+
+def task_added_text(task_text, due_at=None, utc_offset=0):
+    if due_at is None:
+        return f"✅ Задача добавлена: *{task_text}*"
+    return f"✅ Задача добавлена: *{task_text}*\n⏰ Напомню {format_due(due_at, utc_offset)}"
+
+def reminder_text(task):
+    return f"⏰ *Напоминание:* {task['task_text']}"
+
+def format_tasks_page(tasks, utc_offset=0):
+    """Текст страницы задач, не длиннее MESSAGE_LIMIT.
+
+    Строки собираются в список и склеиваются один раз; если очередная задача
+    не помещается, страница обрывается на ней. Возвращает (текст, число
+    показанных задач).
+    """
+    lines = [TASKS_HEADER]
+    size = len(TASKS_HEADER) + len(TASKS_FOOTER)
+    shown = 0
+    for task in tasks:
+        task_text = task['task_text']
+        if len(task_text) > TASK_PREVIEW_LIMIT:
+            task_text = task_text[:TASK_PREVIEW_LIMIT] + '…'
+        if task['due_at'] is not None:
+            task_text = f"{task_text} ⏰ {format_due(task['due_at'], utc_offset)}"
+        line = f"{task['id']}. {task_text}\n"
+        if shown and size + len(line) > MESSAGE_LIMIT:
+            break
+        lines.append(line)
+        size += len(line)
+        shown += 1
+    lines.append(TASKS_FOOTER)
+    return ''.join(lines), shown
@@ -0,0 +1,245 @@
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+# Границы корзин гистограмм (секунды): от 0.5 мс до 10 с
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    """Гистограмма одного набора значений меток (формат Prometheus)"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class HistogramFamily:
+    """Гистограммы с метками: labels(...) возвращает гистограмму для значений меток"""
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for values, child in sorted(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_labels = ','.join(labels + [f'le="{le}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            suffix = f'{{{",".join(labels)}}}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return '\n'.join(lines)
+
+
+class GaugeFamily:
+    """Значения, снимаемые в момент запроса /metrics.
+
+    collector() возвращает {значения меток: число}; пока он не задан,
+    серия не отдает ни одного значения.
+    """
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.collector = None
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        values = self.collector() if self.collector is not None else {}
+        for label_values, value in sorted(values.items()):
+            labels = ','.join(
+                f'{name}="{_escape(label)}"' for name, label in zip(self.label_names, label_values)
+            )
+            lines.append(f'{self.name}{{{labels}}} {value}' if labels else f'{self.name} {value}')
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = HistogramFamily(
+                    name, documentation, label_names, buckets
+                )
+            return family
+
+    def gauge(self, name, documentation, label_names=()):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = GaugeFamily(name, documentation, label_names)
+            return family
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            families = list(self._families.values())
+        return '\n'.join(family.render() for family in families) + '\n'
+
+
+registry = MetricsRegistry()
+
+HANDLER_SECONDS = registry.histogram(
+    'bot_handler_seconds', 'Время работы обработчиков апдейтов', ('handler',)
+)
+DB_SECONDS = registry.histogram(
+    'bot_db_seconds', 'Время операций с базой данных', ('operation',)
+)
+UPSTREAM_SECONDS = registry.histogram(
+    'bot_upstream_seconds', 'Время запросов к внешним API', ('provider',)
+)
+SEND_SECONDS = registry.histogram(
+    'bot_send_seconds', 'Время вызова отправки сообщения в Bot API', ()
+)
+SEND_QUEUE_SECONDS = registry.histogram(
+    'bot_send_queue_seconds', 'Время от постановки сообщения в очередь до отправки', ()
+)
+SEND_QUEUE_DEPTH = registry.gauge(
+    'bot_send_queue_depth', 'Сообщений в очереди отправки'
+)
+SEND_PAUSED_CHATS = registry.gauge(
+    'bot_send_paused_chats', 'Чатов на паузе retry_after после ответа 429'
+)
+RATE_PREFETCH_SECONDS = registry.histogram(
+    'bot_rate_prefetch_seconds', 'Время фонового обновления таблицы курсов', ('outcome',)
+)
+RATE_TABLE_AGE = registry.gauge(
+    'bot_rate_table_age_seconds', 'Возраст таблиц курсов в кэше', ('base',)
+)
+DISPATCH_SECONDS = registry.histogram(
+    'bot_dispatch_seconds', 'Время обработки апдейта воркером пула', ('pool',)
+)
+DISPATCH_QUEUE_DEPTH = registry.gauge(
+    'bot_dispatch_queue_depth', 'Апдейтов в очередях пула воркеров', ('pool',)
+)
+DISPATCH_BUSY_WORKERS = registry.gauge(
+    'bot_dispatch_busy_workers', 'Воркеров пула, занятых обработкой', ('pool',)
+)
+REMINDER_LAG_SECONDS = registry.histogram(
+    'bot_reminder_lag_seconds', 'Опоздание отправки напоминания относительно срока', ()
+)
+REMINDERS_PENDING = registry.gauge(
+    'bot_reminders_pending', 'Напоминаний в колесе таймеров (загруженное окно)'
+)
+
+
+def timed(family, *label_values):
+    """Декоратор: время вызова функции (или корутины) в гистограмму family с метками label_values"""
+    histogram = family.labels(*label_values)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+    return decorator
+
+
+def instrument_handler(func):
+    """Время обработчика апдейта в bot_handler_seconds{handler=<имя функции>}"""
+    return timed(HANDLER_SECONDS, func.__name__)(func)
+
+
+def make_metrics_app(path='/metrics'):
+    """WSGI-приложение, отдающее метрики реестра"""
+
+    def app(environ, start_response):
+        if environ.get('PATH_INFO') != path:
+            start_response('404 Not Found', [('Content-Length', '0')])
+            return [b'']
+        body = registry.render().encode()
+        start_response('200 OK', [
+            ('Content-Type', 'text/plain; version=0.0.4; charset=utf-8'),
+            ('Content-Length', str(len(body))),
+        ])
+        return [body]
+
+    return app
+
+
+def start_metrics_server(host='127.0.0.1', port=9100):
+    """Запустить /metrics в фоновом потоке; None, если порт занят - бот работает без метрик"""
+    from utils.webhook import make_webhook_server # wsgiref нужен только здесь
+    try:
+        server = make_webhook_server(make_metrics_app(), host, port)
+    except OSError as e:
+        logging.error(f'Метрики не запущены ({host}:{port}): {e}')
+        return None
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
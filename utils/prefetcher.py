@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+
+from utils.metrics import RATE_PREFETCH_SECONDS, RATE_TABLE_AGE
+
+
+class RatePrefetcher:
+    """Фоновое обновление таблиц курсов для самых популярных базовых валют.
+
+    record() вызывается на каждый /currency и считает запросы по базам;
+    счетчики затухают вдвое за каждый цикл, так что популярность отражает
+    недавний трафик. Раз в interval секунд top_n баз загружаются заново
+    и кладутся в кэш, поэтому ходовые пары отвечаются из памяти, а редкие
+    по-прежнему загружаются по требованию.
+    """
+
+    def __init__(self, cache, loader, top_n=4, interval=600, seed_bases=()):
+        self.cache = cache
+        self.loader = loader
+        self.top_n = top_n
+        self.interval = interval
+        self._counts = {base: 1.0 for base in seed_bases}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.refreshes = 0
+        self.failures = 0
+        RATE_TABLE_AGE.collector = self._table_ages
+
+    def record(self, base):
+        with self._lock:
+            self._counts[base] = self._counts.get(base, 0.0) + 1.0
+
+    def hot_bases(self):
+        """Базы для обновления: top_n по затухающему числу запросов"""
+        with self._lock:
+            ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return [base for base, _ in ranked[:self.top_n]]
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='rate-prefetch', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def refresh(self):
+        """Один цикл: загрузить горячие базы и состарить счетчики"""
+        for base in self.hot_bases():
+            start = time.perf_counter()
+            try:
+                rates = self.loader(base)
+            except Exception as e:
+                rates = None
+                logging.warning(f'Фоновое обновление курсов {base} не удалось: {e}')
+            outcome = 'ok' if rates else 'error'
+            RATE_PREFETCH_SECONDS.labels(outcome).observe(time.perf_counter() - start)
+            if rates:
+                self.cache.put(base, rates)
+                self.refreshes += 1
+            else:
+                self.failures += 1
+        with self._lock:
+            self._counts = {
+                base: count / 2 for base, count in self._counts.items() if count >= 0.1
+            }
+
+    def stats(self):
+        return {
+            'hot_bases': self.hot_bases(),
+            'refreshes': self.refreshes,
+            'failures': self.failures,
+        }
+
+    def _run(self):
+        while True:
+            self.refresh()
+            if self._stop.wait(self.interval):
+                return
+
+    def _table_ages(self):
+        return {(base,): round(age, 3) for base, age in self.cache.ages().items()}
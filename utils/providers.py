@@ -0,0 +1,206 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Ответы, которые значат "нет таких данных" (например, неизвестная валюта),
+# а не неисправность провайдера
+MISS_STATUSES = (400, 404, 422)
+
+
+class NoData(Exception):
+    """Провайдер исправен, но данных по запросу нет: не ошибка для статистики"""
+
+
+class ProviderStats:
+    """Статистика одного провайдера: EWMA задержки и ошибок, состояние предохранителя"""
+
+    def __init__(self, name, alpha):
+        self.name = name
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.recent = deque(maxlen=100)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.hedged = 0
+        self.opened = 0
+
+    def success(self, elapsed):
+        self.requests += 1
+        self.recent.append(elapsed)
+        self.latency = elapsed if self.latency is None else (
+            self.alpha * elapsed + (1 - self.alpha) * self.latency
+        )
+        self.error_rate *= 1 - self.alpha
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def observe(self, elapsed):
+        """Задержка без результата (запрос отменен хеджированием) - нижняя оценка"""
+        self.recent.append(elapsed)
+        if self.latency is None or elapsed > self.latency:
+            self.latency = self.alpha * elapsed + (1 - self.alpha) * (self.latency or elapsed)
+
+    def failure(self, threshold, cooldown):
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= threshold:
+            if not self.is_open():
+                self.opened += 1
+            self.open_until = time.monotonic() + cooldown
+            logging.warning(f"Провайдер {self.name} отключен на {cooldown} с")
+
+    def is_open(self):
+        return time.monotonic() < self.open_until
+
+    def percentile(self, q):
+        if not self.recent:
+            return None
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class ProviderSelector:
+    """Выбор провайдера с хеджированием запросов.
+
+    Провайдеры упорядочиваются по EWMA задержки с поправкой на долю ошибок,
+    провайдеры с открытым предохранителем пропускаются. Следующий провайдер
+    запускается, если текущий не ответил за свой перцентиль задержки
+    (или сразу после ошибки); побеждает первый валидный ответ.
+    """
+
+    def __init__(self, percentile=0.9, min_delay=0.2, max_delay=2.0,
+                 alpha=0.2, failure_threshold=3, cooldown=30, workers=16):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.workers = workers
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def stats(self, name):
+        with self._lock:
+            if name not in self._stats:
+                self._stats[name] = ProviderStats(name, self.alpha)
+            return self._stats[name]
+
+    def order(self, calls):
+        """Провайдеры в порядке предпочтения (без отключенных, если есть живые)"""
+        def score(call):
+            stats = self.stats(call[0])
+            latency = stats.latency if stats.latency is not None else 0.0
+            return latency * (1 + 4 * stats.error_rate) + stats.error_rate
+
+        ordered = sorted(calls, key=score)
+        available = [call for call in ordered if not self.stats(call[0]).is_open()]
+        return available or ordered
+
+    def hedge_delay(self, name):
+        """Через сколько секунд запускать следующий провайдер"""
+        value = self.stats(name).percentile(self.percentile)
+        if value is None:
+            return self.max_delay
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def record(self, name, elapsed, ok):
+        stats = self.stats(name)
+        with self._lock:
+            if ok:
+                stats.success(elapsed)
+            else:
+                stats.failure(self.failure_threshold, self.cooldown)
+
+    def record_hedged(self, name, elapsed):
+        """name не ответил за elapsed секунд - запущен следующий провайдер.
+
+        elapsed - нижняя оценка его задержки: зависший провайдер без
+        единого ответа иначе так и оставался бы первым в order().
+        """
+        logging.info(f"{name} отвечает медленно, запускаем следующий провайдер")
+        stats = self.stats(name)
+        with self._lock:
+            stats.hedged += 1
+            stats.observe(elapsed)
+
+    def record_cancelled(self, name, elapsed):
+        stats = self.stats(name)
+        with self._lock:
+            stats.observe(elapsed)
+
+    def race(self, calls):
+        """calls - список (имя, функция без аргументов).
+
+        None от функции считается ошибкой провайдера, NoData - валидным
+        ответом без данных; в обоих случаях пробуется следующий провайдер.
+        """
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='hedge')
+
+        results = queue.Queue()
+        pending = deque(self.order(calls))
+        launched = finished = 0
+        current = None
+
+        def run(name, func):
+            start = time.perf_counter()
+            try:
+                value = func()
+                ok = value is not None
+            except NoData:
+                value, ok = None, True
+            except Exception as e:
+                logging.warning(f"❌ {name} ошибка: {e}")
+                value, ok = None, False
+            self.record(name, time.perf_counter() - start, ok)
+            results.put(value)
+
+        def launch():
+            name, func = pending.popleft()
+            self._executor.submit(run, name, func)
+            return name
+
+        while pending or finished < launched:
+            if pending and current is None:
+                current = launch()
+                launched += 1
+            timeout = self.hedge_delay(current) if pending else None
+            try:
+                value = results.get(timeout=timeout)
+            except queue.Empty:
+                self.record_hedged(current, timeout)
+                current = None
+                continue
+            finished += 1
+            if value is not None:
+                return value
+            current = None
+        return None
+
+    def snapshot(self):
+        """Текущие метрики провайдеров"""
+        with self._lock:
+            return {
+                name: {
+                    'latency_ewma': stats.latency,
+                    'error_rate': stats.error_rate,
+                    'requests': stats.requests,
+                    'failures': stats.failures,
+                    'hedged': stats.hedged,
+                    'circuit_opened': stats.opened,
+                    'circuit_open': stats.is_open(),
+                }
+                for name, stats in self._stats.items()
+            }
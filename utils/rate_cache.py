@@ -0,0 +1,127 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class RateCache:
+    """Кэш таблиц курсов по базовой валюте.
+
+    Хранит весь словарь rates для базы с TTL и ограничением по числу баз (LRU).
+    Кросс-курсы (например EUR->JPY) считаются из любой свежей таблицы,
+    где есть обе валюты. Одновременные промахи по одной базе
+    объединяются в один запрос (single-flight).
+    """
+
+    def __init__(self, ttl=1800, max_bases=64, log_every=100):
+        self.ttl = ttl
+        self.max_bases = max_bases
+        self.log_every = log_every
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.hits = 0
+        self.cross_hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.coalesced = 0
+
+    def get_rates(self, base):
+        """Свежая таблица курсов для базы или None"""
+        with self._lock:
+            return self._fresh(base)
+
+    def put(self, base, rates):
+        with self._lock:
+            self._tables[base] = (time.monotonic(), dict(rates))
+            self._tables.move_to_end(base)
+            while len(self._tables) > self.max_bases:
+                self._tables.popitem(last=False)
+
+    def ages(self):
+        """Возраст (сек) каждой таблицы в кэше, включая просроченные"""
+        now = time.monotonic()
+        with self._lock:
+            return {base: now - fetched_at for base, (fetched_at, _) in self._tables.items()}
+
+    def get_rate(self, from_currency, to_currency):
+        """Курс из кэша (прямой или кросс-курс) без обращения к сети"""
+        with self._lock:
+            rates = self._fresh(from_currency)
+            if rates is not None and to_currency in rates:
+                self.hits += 1
+                return self._counted(rates[to_currency])
+            for base in list(self._tables):
+                table = self._fresh(base)
+                if table and table.get(from_currency) and to_currency in table:
+                    self.cross_hits += 1
+                    return self._counted(table[to_currency] / table[from_currency])
+            self.misses += 1
+            self._counted(None)
+            return None
+
+    def fetch(self, base, loader):
+        """Загрузить таблицу через loader(base); параллельные вызовы ждут один запрос"""
+        with self._lock:
+            rates = self._fresh(base)
+            if rates is not None:
+                return rates
+            waiter = self._inflight.get(base)
+            leader = waiter is None
+            if leader:
+                waiter = self._inflight[base] = {'event': threading.Event(), 'rates': None}
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            waiter['event'].wait()
+            return waiter['rates']
+
+        try:
+            waiter['rates'] = self.loaded(base, loader(base))
+        finally:
+            with self._lock:
+                del self._inflight[base]
+            waiter['event'].set()
+        return waiter['rates']
+
+    def stats(self):
+        lookups = self.hits + self.cross_hits + self.misses
+        return {
+            'bases': len(self._tables),
+            'hits': self.hits,
+            'cross_hits': self.cross_hits,
+            'misses': self.misses,
+            'fetches': self.fetches,
+            'coalesced': self.coalesced,
+            'hit_ratio': (self.hits + self.cross_hits) / lookups if lookups else 0.0,
+        }
+
+    def _fresh(self, base):
+        entry = self._tables.get(base)
+        if entry is None:
+            return None
+        fetched_at, rates = entry
+        if time.monotonic() - fetched_at > self.ttl:
+            del self._tables[base]
+            return None
+        self._tables.move_to_end(base)
+        return rates
+
+    def loaded(self, base, rates):
+        """Учесть загрузку таблицы (rates может быть None) и сохранить ее в кэш"""
+        self.fetches += 1
+        if rates:
+            self.put(base, rates)
+        return rates
+
+    def _counted(self, rate):
+        lookups = self.hits + self.cross_hits + self.misses
+        if self.log_every and lookups % self.log_every == 0:
+            stats = self.stats()
+            logging.info(
+                f"Кэш курсов: hit_ratio={stats['hit_ratio']:.2f}, "
+                f"запросов к API сэкономлено={stats['hits'] + stats['cross_hits'] + stats['coalesced']}, "
+                f"загрузок={stats['fetches']}"
+            )
+        return rate
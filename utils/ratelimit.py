@@ -0,0 +1,105 @@
+import threading
+import time
+
+# Группа, лимит которой действует на все сообщения пользователя
+ANY_COMMAND = '*'
+# Ключ состояния - одно целое: user_id * GROUP_SLOTS + номер группы
+GROUP_SLOTS = 16
+
+
+def parse_limits(spec):
+    """'*:30/60,weather:5/60' -> {'*': (30, 60.0), 'weather': (5, 60.0)}"""
+    limits = {}
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        group, _, rule = item.partition(':')
+        count, _, period = rule.partition('/')
+        limits[group.strip()] = (int(count), float(period))
+    return limits
+
+
+def limit_group(name):
+    """Декоратор: обработчик расходует лимит группы name (кроме общего лимита)"""
+    def decorator(handler):
+        handler.rate_limit_group = name
+        return handler
+    return decorator
+
+
+class RateLimiter:
+    """Лимиты запросов по пользователям и группам команд (GCRA).
+
+    Группа с лимитом count запросов за period секунд - ведро токенов
+    емкостью count, пополняемое равномерно; состояние ведра - одно число,
+    теоретическое время следующего запроса (TAT). Ведро, у которого
+    TAT в прошлом, полностью восстановлено и неотличимо от отсутствующего,
+    поэтому состояния хранятся в двух поколениях словарей: раз в
+    наибольший period старое поколение выбрасывается целиком, без обхода,
+    а активные ключи переносятся в новое при обращении.
+    """
+
+    def __init__(self, limits):
+        if len(limits) >= GROUP_SLOTS:
+            raise ValueError(f'Не больше {GROUP_SLOTS - 1} групп лимитов')
+        self._groups = {}
+        for index, (group, (count, period)) in enumerate(sorted(limits.items())):
+            interval = period / count
+            # (номер группы, интервал между запросами, допустимое опережение)
+            self._groups[group] = (index, interval, period - interval)
+        self.period = max((period for _, period in limits.values()), default=0.0)
+        self._current = {}
+        self._previous = {}
+        self._notified = {}
+        self._notified_previous = {}
+        self._rotated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, user_id, group=ANY_COMMAND):
+        """0.0 - запрос разрешен и учтен; иначе через сколько секунд повторить"""
+        limit = self._groups.get(group)
+        if limit is None:
+            return 0.0
+        index, interval, tolerance = limit
+        key = user_id * GROUP_SLOTS + index
+        now = time.monotonic()
+        with self._lock:
+            if now - self._rotated_at >= self.period:
+                self._rotate(now)
+            tat = self._current.get(key)
+            if tat is None:
+                tat = self._previous.get(key, now)
+            if tat < now:
+                tat = now
+            if tat - now > tolerance:
+                self.rejected += 1
+                return tat - now - tolerance
+            self._current[key] = tat + interval
+            self.allowed += 1
+            return 0.0
+
+    def first_rejection(self, user_id, retry_after):
+        """True для первого отказа пользователю за время retry_after: о лимите сообщается один раз"""
+        now = time.monotonic()
+        with self._lock:
+            until = self._notified.get(user_id) or self._notified_previous.get(user_id)
+            if until is not None and until > now:
+                return False
+            self._notified[user_id] = now + retry_after
+            return True
+
+    def stats(self):
+        return {
+            'keys': len(self._current) + len(self._previous),
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+        }
+
+    def _rotate(self, now):
+        # старое поколение не трогали весь period: все его ведра уже полные
+        self._previous, self._current = self._current, {}
+        self._notified_previous, self._notified = self._notified, {}
+        self._rotated_at = now
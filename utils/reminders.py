@@ -0,0 +1,153 @@
+import logging
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from utils.metrics import REMINDER_LAG_SECONDS, REMINDERS_PENDING
+from utils.timer_wheel import TimerWheel
+
+# "... at 18:00", "... в 18:00", "... at 25.12 9:30" в конце текста задачи
+DUE_PATTERN = re.compile(
+    r'\s+(?:at|в)\s+(?:(\d{1,2})\.(\d{1,2})\s+)?(\d{1,2}):(\d{2})\s*$', re.IGNORECASE
+)
+
+
+def split_due(text, now, utc_offset=0):
+    """(текст задачи, срок в unix-времени или None).
+
+    Время без даты - ближайшее такое время (сегодня или завтра), дата без
+    года - ближайшая такая дата. utc_offset - часовой пояс пользователя в часах.
+    """
+    match = DUE_PATTERN.search(text)
+    if match is None or not text[:match.start()].strip():
+        return text, None
+    day, month, hour, minute = (int(value) if value else None for value in match.groups())
+    local_now = datetime.fromtimestamp(now, timezone(timedelta(hours=utc_offset)))
+    try:
+        due = local_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        if day is not None:
+            due = due.replace(month=month, day=day)
+            if due.timestamp() <= now:
+                due = due.replace(year=due.year + 1)
+        elif due.timestamp() <= now:
+            due += timedelta(days=1)
+    except ValueError:
+        return text, None
+    return text[:match.start()].strip(), int(due.timestamp())
+
+
+class ReminderScheduler:
+    """Отправка напоминаний о задачах к сроку.
+
+    В памяти - только напоминания ближайших horizon секунд, в колесе
+    таймеров; следующее окно подгружается из БД страницами (индекс по
+    due_at), когда до конца загруженного остается половина horizon.
+    Новые напоминания внутри окна добавляет schedule(). Сработавшие за
+    тик напоминания одной транзакцией отмечаются в БД (claim_reminders -
+    удаленные задачи и взятые другим процессом отсеиваются) и пачкой
+    передаются в deliver(rows).
+    """
+
+    def __init__(self, store, deliver, tick=1.0, horizon=3600, batch=1000, clock=time.time):
+        self.store = store
+        self.deliver = deliver
+        self.tick = tick
+        self.horizon = horizon
+        self.batch = batch
+        self.clock = clock
+        self.wheel = TimerWheel(tick, now=clock())
+        self._lock = threading.Lock()
+        self._loaded_until = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.fired = 0
+        self.delivered = 0
+        REMINDERS_PENDING.collector = lambda: {(): len(self.wheel)}
+
+    def schedule(self, task_id, user_id, due_at):
+        """Новое напоминание: в колесо, если срок внутри загруженного окна"""
+        with self._lock:
+            if self._loaded_until is not None and due_at < self._loaded_until:
+                self.wheel.schedule(due_at, (user_id, task_id))
+
+    def load(self, now):
+        """Подгрузить напоминания до now + horizon (при первом вызове - и просроченные)"""
+        previous = self._loaded_until
+        since = previous if previous is not None else 0
+        until = now + self.horizon
+        with self._lock:
+            # задачи, добавленные во время загрузки, schedule() кладет в колесо сам
+            self._loaded_until = until
+        loaded = 0
+        page = []
+        try:
+            for row in self.store.iter_reminders(since, until, self.batch):
+                page.append((row['due_at'], (row['user_id'], row['id'])))
+                if len(page) >= self.batch:
+                    loaded += self._schedule_page(page)
+                    page = []
+        except Exception:
+            # окно загрузится заново на следующем тике; уже попавшие в колесо
+            # повторы отсеет claim_reminders
+            with self._lock:
+                self._loaded_until = previous
+            raise
+        loaded += self._schedule_page(page)
+        if loaded:
+            logging.info(f'Загружено напоминаний: {loaded} (до {datetime.fromtimestamp(until)})')
+        return loaded
+
+    def run_once(self, now):
+        """Один тик: сработавшие напоминания - в БД и на отправку; возвращает число отправленных"""
+        with self._lock:
+            fired = self.wheel.advance(now)
+        delivered = 0
+        if fired:
+            self.fired += len(fired)
+            try:
+                rows = self.store.claim_reminders([item for _, item in fired])
+            except Exception:
+                # из БД они больше не подгрузятся - повторить на следующем тике
+                self._schedule_page([(now + self.tick, item) for _, item in fired])
+                raise
+            for row in rows:
+                REMINDER_LAG_SECONDS.labels().observe(max(0.0, now - row['due_at']))
+            if rows:
+                self.deliver(rows)
+            delivered = len(rows)
+            self.delivered += delivered
+        if self._loaded_until is None or now + self.horizon / 2 >= self._loaded_until:
+            self.load(now)
+        return delivered
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='reminders', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def stats(self):
+        return {'pending': len(self.wheel), 'fired': self.fired, 'delivered': self.delivered}
+
+    def _schedule_page(self, page):
+        with self._lock:
+            for due_at, item in page:
+                self.wheel.schedule(due_at, item)
+        return len(page)
+
+    def _run(self):
+        next_tick = self.clock()
+        while not self._stop.wait(max(0.0, next_tick - self.clock())):
+            try:
+                self.run_once(self.clock())
+            except Exception as e:
+                logging.error(f'Ошибка отправки напоминаний: {e}')
+            # тики по абсолютному расписанию: долгая пачка не сдвигает следующие,
+            # а после отставания колесо догоняет время за один advance
+            next_tick = max(next_tick + self.tick, self.clock())
@@ -0,0 +1,134 @@
+# Маркеры типов аргументов: остаток текста как есть / оставшиеся слова списком
+REST = 'rest'
+WORDS = 'words'
+# Действие-заглушка для неизвестной подкоманды
+ANY = '*'
+
+
+def upper(value):
+    return value.upper()
+
+
+def tokenize(text):
+    """Слова сообщения - один проход str.split без повторного разбора в обработчиках"""
+    return text.split()
+
+
+def rest_of(text, position):
+    """Текст начиная со слова position как есть (внутренние пробелы сохраняются)"""
+    return text.split(None, position)[position].strip()
+
+
+class ArgumentError(Exception):
+    """Аргументы команды не разобрались; text - ответ пользователю"""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.text = text
+
+
+class Route:
+    """Обработчик команды и типы его аргументов.
+
+    params - конвертеры по порядку слов (int, float, upper, str ...);
+    последним может стоять REST или WORDS. usage отправляется при неверном
+    числе аргументов, invalid - при ошибке конвертации; оба могут быть
+    функциями от списка слов-аргументов.
+    """
+
+    __slots__ = ('handler', 'params', 'usage', 'invalid')
+
+    def __init__(self, handler, params=(), usage=None, invalid=None):
+        self.handler = handler
+        self.params = tuple(params)
+        self.usage = usage
+        self.invalid = invalid
+
+    def parse(self, text, tokens, start):
+        args = []
+        for index, kind in enumerate(self.params):
+            position = start + index
+            if kind is WORDS:
+                args.append(tokens[position:])
+                return args
+            if position >= len(tokens):
+                raise self._error(self.usage, tokens, start)
+            if kind is REST:
+                args.append(rest_of(text, position))
+                return args
+            try:
+                args.append(kind(tokens[position]))
+            except ValueError:
+                raise self._error(self.invalid or self.usage, tokens, start)
+        if start + len(self.params) < len(tokens) and self.usage is not None:
+            raise self._error(self.usage, tokens, start)
+        return args
+
+    @staticmethod
+    def _error(message, tokens, start):
+        if callable(message):
+            message = message(tokens[start:])
+        return ArgumentError(message)
+
+
+class CommandRouter:
+    """Таблица команд и кнопок клавиатуры.
+
+    Команда разбирается одним поиском в словаре по (команде, подкоманде),
+    кнопки - по точному тексту. Обработчик вызывается как
+    handler(message, *аргументы).
+    """
+
+    def __init__(self):
+        self._commands = {}
+        self._buttons = {}
+        self._fallback = None
+
+    def command(self, name, action=None, params=(), usage=None, invalid=None):
+        """Декоратор: /name [action] аргументы...
+
+        action=None - команда без подкоманды, ANY - неизвестная подкоманда.
+        """
+        def decorator(handler):
+            actions = self._commands.setdefault(name.lower(), {})
+            actions[action] = Route(handler, params, usage, invalid)
+            return handler
+        return decorator
+
+    def button(self, *texts):
+        """Декоратор: точный текст кнопки клавиатуры"""
+        def decorator(handler):
+            for text in texts:
+                self._buttons[text] = Route(handler)
+            return handler
+        return decorator
+
+    def fallback(self, handler):
+        """Обработчик всего, что не разобралось"""
+        self._fallback = Route(handler)
+        return handler
+
+    def resolve(self, text):
+        """(обработчик, аргументы) для текста сообщения; ArgumentError при ошибке аргументов"""
+        route = self._buttons.get(text.strip())
+        if route is not None:
+            return route.handler, []
+        if text.startswith('/'):
+            tokens = tokenize(text)
+            actions = self._commands.get(tokens[0][1:].partition('@')[0].lower())
+            if actions is not None:
+                start = 1
+                route = None
+                if len(tokens) > 1:
+                    action = tokens[1].lower()
+                    if action != ANY:
+                        route = actions.get(action)
+                    if route is not None:
+                        start = 2
+                    else:
+                        route = actions.get(ANY)
+                if route is None:
+                    route = actions.get(None)
+                if route is not None:
+                    return route.handler, route.parse(text, tokens, start)
+        return self._fallback.handler, []
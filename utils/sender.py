@@ -0,0 +1,228 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.metrics import SEND_QUEUE_SECONDS, SEND_SECONDS
+
+PRIORITY_REPLY = 0
+PRIORITY_BROADCAST = 1
+
+
+class TokenBucket:
+    """Ведро токенов: rate токенов в секунду, не больше capacity"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def delay(self, now):
+        """Сколько ждать до появления токена (0 - токен есть)"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class MessageSender:
+    """Очередь исходящих сообщений с учетом лимитов Telegram.
+
+    send() только ставит сообщение в очередь и сразу возвращает управление.
+    Планировщик соблюдает общий и поличатовый лимиты (token bucket),
+    порядок сообщений внутри чата, приоритет ответов над рассылками
+    и паузу retry_after из ответа 429. Пауза действует только на чат,
+    получивший 429: остальные чаты отправляются дальше в пределах общего лимита.
+    """
+
+    def __init__(self, send_func, global_rate=30, chat_rate=1, chat_burst=3,
+                 workers=8, max_retries=3, global_burst=None):
+        self.send_func = send_func
+        self.global_bucket = TokenBucket(global_rate, global_burst or global_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.workers = workers
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._lanes = {PRIORITY_REPLY: [], PRIORITY_BROADCAST: []}
+        self._chats = {}
+        self._buckets = {}
+        self._busy = set()
+        self._seq = itertools.count()
+        self._paused = {}
+        self._thread = None
+        self._executor = None
+        self._stopping = False
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start(self):
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='sender')
+        self._thread = threading.Thread(target=self._run, name='sender', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        """Дождаться отправки очереди и остановить планировщик"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while (self._chats or self._busy) and time.monotonic() < deadline:
+                self._cond.wait(0.05)
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._executor.shutdown()
+        self._thread = None
+
+    def send(self, chat_id, text, priority=PRIORITY_REPLY, **kwargs):
+        """Поставить сообщение в очередь (без запущенного планировщика - отправить сразу)"""
+        if self._thread is None:
+            with SEND_SECONDS.labels().time():
+                return self.send_func(chat_id, text, **kwargs)
+        message = {
+            'chat_id': chat_id, 'text': text, 'kwargs': kwargs,
+            'priority': priority, 'enqueued_at': time.monotonic(), 'attempts': 0,
+        }
+        with self._cond:
+            queue = self._chats.get(chat_id)
+            if queue is None:
+                queue = self._chats[chat_id] = deque()
+            queue.append(message)
+            if len(queue) == 1 and chat_id not in self._busy:
+                self._schedule(chat_id, time.monotonic())
+            self._cond.notify()
+
+    def broadcast(self, chat_ids, text, **kwargs):
+        for chat_id in chat_ids:
+            self.send(chat_id, text, priority=PRIORITY_BROADCAST, **kwargs)
+
+    def queue_depth(self):
+        with self._cond:
+            return sum(len(queue) for queue in self._chats.values())
+
+    def paused_chats(self):
+        """Чатов, ждущих окончания паузы retry_after после 429"""
+        now = time.monotonic()
+        with self._cond:
+            return sum(1 for until in self._paused.values() if until > now)
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth(),
+            'in_flight': len(self._busy),
+            'paused_chats': self.paused_chats(),
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'latency_avg': self.latency_total / self.sent if self.sent else 0.0,
+            'latency_max': self.latency_max,
+        }
+
+    def _schedule(self, chat_id, not_before):
+        """Поставить чат в полосу приоритета его первого сообщения"""
+        priority = self._chats[chat_id][0]['priority']
+        heapq.heappush(self._lanes[priority], (not_before, next(self._seq), chat_id))
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _next_ready(self, now):
+        """Готовый к отправке чат с наивысшим приоритетом или время ожидания"""
+        wait = None
+        for lane in (self._lanes[PRIORITY_REPLY], self._lanes[PRIORITY_BROADCAST]):
+            while lane:
+                not_before, _, chat_id = lane[0]
+                if not_before > now:
+                    wait = not_before - now if wait is None else min(wait, not_before - now)
+                    break
+                delay = self._chat_bucket(chat_id).delay(now)
+                heapq.heappop(lane)
+                if delay > 0:
+                    heapq.heappush(lane, (now + delay, next(self._seq), chat_id))
+                    continue
+                return chat_id, None
+        return None, wait
+
+    def _run(self):
+        with self._cond:
+            while not self._stopping:
+                now = time.monotonic()
+                global_delay = self.global_bucket.delay(now)
+                if global_delay > 0:
+                    self._cond.wait(global_delay)
+                    continue
+                chat_id, wait = self._next_ready(now)
+                if chat_id is None:
+                    self._cond.wait(wait)
+                    continue
+                self.global_bucket.take()
+                self._chat_bucket(chat_id).take()
+                self._busy.add(chat_id)
+                message = self._chats[chat_id].popleft()
+                self._executor.submit(self._deliver, message)
+
+    def _deliver(self, message):
+        chat_id = message['chat_id']
+        retry_after = None
+        start = time.monotonic()
+        SEND_QUEUE_SECONDS.labels().observe(start - message['enqueued_at'])
+        try:
+            self.send_func(chat_id, message['text'], **message['kwargs'])
+            ok = True
+        except Exception as e:
+            ok = False
+            retry_after = _retry_after(e)
+            logging.warning(f'Ошибка отправки в чат {chat_id}: {e}')
+        SEND_SECONDS.labels().observe(time.monotonic() - start)
+
+        with self._cond:
+            now = time.monotonic()
+            self._busy.discard(chat_id)
+            self._paused.pop(chat_id, None)
+            queue = self._chats[chat_id]
+            not_before = now
+            if ok:
+                elapsed = now - message['enqueued_at']
+                self.sent += 1
+                self.latency_total += elapsed
+                self.latency_max = max(self.latency_max, elapsed)
+            elif retry_after is not None and message['attempts'] < self.max_retries:
+                message['attempts'] += 1
+                self.retries += 1
+                queue.appendleft(message)
+                not_before = self._paused[chat_id] = now + retry_after
+            else:
+                self.failed += 1
+            if queue:
+                self._schedule(chat_id, not_before)
+            else:
+                del self._chats[chat_id]
+                if len(self._buckets) > 100000:
+                    # ведра простаивающих чатов восстановятся до полного объема
+                    self._buckets = {
+                        cid: bucket for cid, bucket in self._buckets.items() if cid in self._chats
+                    }
+            self._cond.notify_all()
+
+
+def _retry_after(error):
+    """retry_after из ошибки 429 Bot API (telebot.apihelper.ApiTelegramException)"""
+    if getattr(error, 'error_code', None) != 429:
+        return None
+    result = getattr(error, 'result_json', None) or {}
+    return result.get('parameters', {}).get('retry_after', 1)
@@ -0,0 +1,20 @@
+import telebot # type: ignore
+
+from utils.dispatcher import update_chat_id
+
+
+class DispatchingTeleBot(telebot.TeleBot):
+    """TeleBot, раздающий апдейты пулу воркеров с сохранением порядка по чатам"""
+
+    def __init__(self, token, dispatcher, **kwargs):
+        super().__init__(token, threaded=False, **kwargs)
+        self.dispatcher = dispatcher
+
+    def process_new_updates(self, updates):
+        if updates:
+            # offset getUpdates двигает базовый process_new_updates, а он теперь
+            # выполняется позже в воркере: без этого polling получает те же апдейты снова
+            self.last_update_id = max(self.last_update_id, max(u.update_id for u in updates))
+        process = super().process_new_updates
+        for update in updates:
+            self.dispatcher.submit(update_chat_id(update), process, [update])
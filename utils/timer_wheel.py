@@ -0,0 +1,91 @@
+import heapq
+import math
+
+
+class TimerWheel:
+    """Иерархическое колесо таймеров.
+
+    Время делится на тики по tick секунд; уровень l колеса - slots ячеек
+    по slots**l тиков. Таймер кладется в ячейку уровня, на котором
+    укладывается его задержка, и спускается на уровень ниже, когда
+    колесо доходит до начала его ячейки, поэтому добавление и срабатывание
+    стоят O(1) независимо от числа таймеров. Таймеры дальше
+    slots**levels тиков ждут в куче и попадают в колесо по мере
+    приближения. Срабатывание - не раньше срока и не позже чем через tick.
+    """
+
+    def __init__(self, tick=1.0, slots=64, levels=4, now=0.0):
+        if slots & (slots - 1):
+            raise ValueError('slots должно быть степенью двойки')
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._bits = slots.bit_length() - 1
+        self._mask = slots - 1
+        self._span = slots ** levels
+        self._wheel = [[[] for _ in range(slots)] for _ in range(levels)]
+        self._overflow = []
+        self._ready = []
+        self._current = math.floor(now / tick)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, when, item):
+        """Срабатывание item в момент when (секунды той же шкалы, что и now)"""
+        self._count += 1
+        self._place((math.ceil(when / self.tick), when, item))
+
+    def advance(self, now):
+        """Сработавшие к моменту now таймеры: список (when, item)"""
+        target = math.floor(now / self.tick)
+        fired = self._ready
+        self._ready = []
+        if not self._count:
+            self._current = max(self._current, target)
+            return fired
+        bits, mask, wheel = self._bits, self._mask, self._wheel
+        while self._current < target and self._count > len(fired):
+            self._current += 1
+            current = self._current
+            for level in range(self.levels - 1, 0, -1):
+                if current & ((1 << (bits * level)) - 1) == 0:
+                    self._cascade(level, (current >> (bits * level)) & mask)
+            if current & ((1 << (bits * (self.levels - 1))) - 1) == 0:
+                self._pull_overflow()
+            slot = wheel[0][current & mask]
+            if slot:
+                fired.extend((when, item) for _, when, item in slot)
+                slot.clear()
+            if self._ready:
+                fired.extend(self._ready)
+                self._ready = []
+        self._current = max(self._current, target)
+        self._count -= len(fired)
+        return fired
+
+    def _place(self, entry):
+        due_tick = entry[0]
+        delay = due_tick - self._current
+        if delay <= 0:
+            self._ready.append(entry[1:])
+            return
+        if delay >= self._span:
+            heapq.heappush(self._overflow, (due_tick, id(entry), entry))
+            return
+        level = 0
+        while delay >= 1 << (self._bits * (level + 1)):
+            level += 1
+        self._wheel[level][(due_tick >> (self._bits * level)) & self._mask].append(entry)
+
+    def _cascade(self, level, index):
+        slot = self._wheel[level][index]
+        if slot:
+            self._wheel[level][index] = []
+            for entry in slot:
+                self._place(entry)
+
+    def _pull_overflow(self):
+        while self._overflow and self._overflow[0][0] - self._current < self._span:
+            self._place(heapq.heappop(self._overflow)[2])
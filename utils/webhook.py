@@ -0,0 +1,59 @@
+import hmac
+import json
+import logging
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+SECRET_HEADER = 'HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN'
+
+
+def make_webhook_app(on_update, path='/webhook', secret_token=None):
+    """WSGI-приложение для приема апдейтов Telegram.
+
+    on_update(payload) получает разобранный JSON апдейта и должен только
+    поставить его в очередь обработки: ответ 200 Telegram получает сразу.
+    Приложение можно запускать через serve_webhook или любой WSGI-сервер
+    (gunicorn и т.п.) в нескольких процессах.
+    """
+
+    def app(environ, start_response):
+        if environ.get('PATH_INFO') != path or environ.get('REQUEST_METHOD') != 'POST':
+            start_response('404 Not Found', [('Content-Length', '0')])
+            return [b'']
+        if secret_token and not hmac.compare_digest(environ.get(SECRET_HEADER, ''), secret_token):
+            start_response('403 Forbidden', [('Content-Length', '0')])
+            return [b'']
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            payload = json.loads(environ['wsgi.input'].read(length))
+            on_update(payload)
+        except ValueError as e:
+            logging.warning(f'Некорректный апдейт вебхука: {e}')
+            start_response('400 Bad Request', [('Content-Length', '0')])
+            return [b'']
+        start_response('200 OK', [('Content-Length', '0')])
+        return [b'']
+
+    return app
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def make_webhook_server(app, host='0.0.0.0', port=8443):
+    """Встроенный многопоточный WSGI-сервер"""
+    return make_server(host, port, app, server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+
+
+def serve_webhook(app, host='0.0.0.0', port=8443):
+    """Запустить встроенный сервер (блокирующий вызов)"""
+    server = make_webhook_server(app, host, port)
+    logging.info(f'Вебхук слушает {host}:{port}')
+    server.serve_forever()